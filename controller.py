@@ -8,17 +8,19 @@ Coordinates background tasks:
 """
 
 import cv2
-import re
 import threading
 import time
-import pexpect
-from collections import deque
+import subprocess
+import queue
+from collections import OrderedDict
+from types import MappingProxyType
 
 from settings import TCPDUMP_CONFIG, WEBCAM_CONFIG, VISUALIZATION_CONFIG, DEBUG, SCAN_RADIUS_METERS
 from model import calculate_difference, rssi_to_distance
 from view import display_signals  # For debugging if needed
 
 import os
+import atexit
 from mqtt_setup import publish_log
 
 # File to store trusted device MAC addresses
@@ -28,21 +30,29 @@ trusted_devices_file = "trusted_devices.txt"
 # Key: MAC address; Value: Trusted name (empty string if no name is set)
 trusted_devices = {}
 
+# Read-only copy of trusted_devices (MAC -> name) for the tcpdump thread. Rebuilt
+# (and swapped in with a single assignment) whenever trusted_devices changes.
+_trusted_snapshot = MappingProxyType({})
+
 # Global variable to indicate if Secure Location is enabled.
 secure_location_enabled = False
 
 # ---------------- GLOBAL VARIABLES ----------------
-detected_devices = set()  # Unique detected device MAC addresses
-device_counts = deque(maxlen=VISUALIZATION_CONFIG['max_data_points'])
-wifi_strengths = deque(maxlen=VISUALIZATION_CONFIG['max_data_points'])
-
 frame = None             # Current webcam frame
+frame_ready = threading.Event()  # Set by webcam_feed() each time frame is replaced
 baseline_image = None    # Baseline frame for image comparison
-stop_threads = False     # Control flag for safely stopping threads
+baseline_gray = None     # Grayscale, downscaled copy of baseline_image the detectors use
+stop_event = threading.Event()  # Set by shutdown() to stop background threads
+
+_tcpdump_proc = None     # Running tcpdump process, terminated on shutdown
 
-# Global dictionary to hold detailed info for each device
+# Maximum number of devices tracked at once. Phones randomize their probe MAC,
+# so without a bound these structures grow for as long as the program runs.
+MAX_TRACKED_DEVICES = 4096
+
+# Global dictionary to hold detailed info for each device, oldest first
 # Key: MAC address; Value: dict with 'mac', 'signal', 'last_seen', 'vendor'
-devices_info = {}
+devices_info = OrderedDict()
 
 # Allowed MAC address prefixes (for filtering)
 allowed_prefixes = {
@@ -68,44 +78,90 @@ VENDOR_MAP = {
     "b6:77:d5": "Won Suk CHO"
 }
 
-printed_devices = set()
+# MAC addresses that have been logged, oldest first (values unused)
+printed_devices = OrderedDict()
+
+# tcpdump -e prints the source MAC as a fixed-width "SA:xx:xx:xx:xx:xx:xx" field
+_MAC_LEN = 17
+
+# Hex digits of a raw MAC; deleting them from a valid MAC leaves nothing
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+
+# Translation table lowercasing hex digits in a raw MAC
+_LOWER = bytes.maketrans(b"ABCDEF", b"abcdef")
+
+# Prefix tables keyed by the 24-bit OUI as an integer, so a packet's prefix
+# can be tested with a single int hash instead of slicing the MAC string.
+ALLOWED_INT = frozenset(int(p.replace(":", ""), 16) for p in allowed_prefixes)
+VENDOR_INT = {int(p.replace(":", ""), 16): v for p, v in VENDOR_MAP.items()}
+
+def _remember(tracked, mac_address, value):
+    """Stores value under mac_address as the most recent entry and evicts the
+    oldest entries once more than MAX_TRACKED_DEVICES are held.
+    Re-inserting moves the entry to the end without move_to_end(), which would
+    raise if the GUI thread removed mac_address in between."""
+    tracked.pop(mac_address, None)
+    tracked[mac_address] = value
+    while len(tracked) > MAX_TRACKED_DEVICES:
+        tracked.popitem(last=False)
+
+# Detections queued by run_tcpdump as (trusted_name, mac, vendor, signal, timestamp)
+# tuples; trusted_name is None for untrusted devices. log_worker formats,
+# prints and publishes them.
+_log_q = queue.SimpleQueue()
+
+_NOT_TRUSTED_FMT = "[NOT TRUSTED] MAC: %s, Vendor: %s, Signal: %d dBm, Time: %s"
+_TRUSTED_FMT = "[TRUSTED] MAC: %s, Name: %s, Vendor: %s, Signal: %d dBm, Time: %s"
+
+# time.ctime() result cached for the current whole second
+_last_sec = 0
+_last_ctime = ""
+
+def _ctime_cached(current_time):
+    """Returns time.ctime() for current_time, reformatting at most once per second."""
+    global _last_sec, _last_ctime
+    sec = int(current_time)
+    if sec != _last_sec:
+        _last_ctime = time.ctime(sec)
+        _last_sec = sec
+    return _last_ctime
 
 def load_trusted_devices():
     """Loads trusted devices from trusted_devices.txt into the global trusted_devices dict.
     If the file does not exist, it is created."""
-    global trusted_devices
+    global trusted_devices, _trusted_snapshot
     if not os.path.exists(trusted_devices_file):
         with open(trusted_devices_file, "w") as f:
             pass  # Create an empty file
-    with open(trusted_devices_file, "r") as f:
-        lines = f.readlines()
     trusted_devices = {}
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        parts = line.split(",", 1)
-        if len(parts) == 2:
-            mac, name = parts[0].strip(), parts[1].strip()
-        else:
-            mac, name = parts[0].strip(), ""
-        trusted_devices[mac] = name
+    with open(trusted_devices_file, "r") as f:
+        for line in f:
+            mac, _, name = line.strip().partition(",")
+            if mac:
+                trusted_devices[mac.strip()] = name.strip()
+    _trusted_snapshot = MappingProxyType(dict(trusted_devices))
 
 load_trusted_devices()
 
+# Kept open for the lifetime of the program; line buffering flushes each entry.
+_trusted_fp = open(trusted_devices_file, "a", buffering=1)
+atexit.register(_trusted_fp.close)
+
 def add_trusted_device(mac, name):
     """Adds a MAC address with a trusted name to the trusted_devices dict and appends it to trusted_devices.txt."""
-    global trusted_devices
+    global trusted_devices, _trusted_snapshot
     if mac not in trusted_devices:
         trusted_devices[mac] = name
-        with open(trusted_devices_file, "a") as f:
-            f.write(f"{mac},{name}\n")
+        _trusted_snapshot = MappingProxyType(dict(trusted_devices))
+        _trusted_fp.write(f"{mac},{name}\n")
 
 def run_tcpdump():
     """
     Runs tcpdump in a separate thread to capture Wi-Fi probe requests.
-    Updates global devices_info (and signal deques for plotting).
+    Output lines are parsed as raw bytes without decoding or stripping them.
+    Updates global devices_info.
     """
+    global _tcpdump_proc
     password = TCPDUMP_CONFIG['password']
     interface = TCPDUMP_CONFIG['interface']
     tcpdump_filter = TCPDUMP_CONFIG['filter']
@@ -114,107 +170,175 @@ def run_tcpdump():
     try:
         if DEBUG:
             print("[DEBUG] Starting tcpdump thread...")
-        # Use -e -vvv so that the output contains MAC addresses and signal info
-        cmd = f"sudo tcpdump -I -e -vvv -i {interface} -n -s {buffer_size} {tcpdump_filter}"
-        child = pexpect.spawn(cmd, timeout=None)
+        # Use -e -vvv so that the output contains MAC addresses and signal info;
+        # -l keeps tcpdump's stdout line-buffered so lines arrive as they are captured
+        cmd = ["sudo", "-S", "tcpdump", "-l", "-I", "-e", "-vvv", "-i", interface,
+               "-n", "-s", str(buffer_size), *tcpdump_filter.split()]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, bufsize=1024 * 64)
+        _tcpdump_proc = proc
         
-        index = child.expect(["Password:", pexpect.EOF], timeout=5)
-        if index == 0:
-            if DEBUG:
-                print("[DEBUG] Sending password for tcpdump...")
-            child.sendline(password)
+        if DEBUG:
+            print("[DEBUG] Sending password for tcpdump...")
+        # sudo -S reads the password from stdin
+        proc.stdin.write(password.encode() + b"\n")
+        proc.stdin.flush()
+        proc.stdin.close()
         
         if DEBUG:
             print("[DEBUG] tcpdump running...")
         
-        while not stop_threads:
+        # Bind per-packet lookups to locals once. secure_location_enabled and
+        # _trusted_snapshot are rebound by other threads, so they are still read
+        # from module globals on every packet. The mutable trusted_devices dict
+        # is never read here.
+        readline = proc.stdout.readline
+        stopped = stop_event.is_set
+        find = bytes.find
+        vendor_get = VENDOR_INT.get
+        now = time.time
+        log_put = _log_q.put
+        remember = _remember
+        info = devices_info
+        printed = printed_devices
+        
+        while not stopped():
             try:
-                line = child.readline().decode(errors="ignore").strip()
+                line = readline()
                 if not line:
-                    continue
+                    if DEBUG:
+                        print("[ERROR] tcpdump EOF encountered.")
+                    break
                 if DEBUG:
-                    print(f"[DEBUG] tcpdump output: {line}")
+                    print(f"[DEBUG] tcpdump output: {line.decode(errors='ignore').strip()}")
                 
-                mac_match = re.search(r"SA:([0-9a-fA-F:]+)", line)
-                signal_match = re.search(r'(-\d+)dBm signal', line)
+                # Parse with plain bytes searches: most lines are rejected by a
+                # single find() without ever entering the regex engine.
+                sa = find(line, b"SA:")
+                if sa < 0:
+                    continue
+                sig_end = find(line, b"dBm signal")
+                if sig_end < 0:
+                    continue
+                mac_raw = line[sa + 3:sa + 3 + _MAC_LEN]
+                if len(mac_raw) != _MAC_LEN or mac_raw[2::3] != b":::::":
+                    continue
+                # int() would also accept whitespace and underscores, so check the digits first
+                mac_hex = mac_raw.replace(b":", b"")
+                if len(mac_hex) != 12 or mac_hex.translate(None, _HEX_DIGITS):
+                    continue
+                try:
+                    mac_int = int(mac_hex, 16)
+                    signal_value = int(line[line.rfind(b" ", 0, sig_end) + 1:sig_end])
+                except ValueError:
+                    continue
                 
-                if mac_match and signal_match:
-                    mac_address = mac_match.group(1).lower()
-                    mac_prefix = mac_address[:8]
-                    
-                    # # Filter based on allowed prefixes
-                    # if mac_prefix not in allowed_prefixes:
-                    #     continue
-                    
-                    signal_value = int(signal_match.group(1))
-                    current_time = time.time()
-                    
-                    # Only print if this device hasn't been printed before
-                    # NOT TRUSTED DEVICES
-                    if secure_location_enabled and (mac_address not in trusted_devices):
-                        # if mac_address not in printed_devices:
-                        message = (f"[NOT TRUSTED] MAC: {mac_address}, Vendor: {VENDOR_MAP.get(mac_prefix, 'Unknown')}, "
-                                    f"Signal: {signal_value} dBm, Time: {time.ctime(current_time)}")
-                        print(message)
-                        publish_log(message)
-                        printed_devices.add(mac_address)
-                            
-                    # Only print if this device hasn't been printed before
-                    # TRUSTED DEVICES
-                    if secure_location_enabled and (mac_address in trusted_devices):
-                        # if mac_address not in printed_devices:
-                        trusted_name = trusted_devices.get(mac_address, "Unknown")
-                        message = (f"[TRUSTED] MAC: {mac_address}, Name: {trusted_name}, Vendor: {VENDOR_MAP.get(mac_prefix, 'Unknown')}, "
-                                    f"Signal: {signal_value} dBm, Time: {time.ctime(current_time)}")
-                        print(message)
-                        publish_log(message)
-                        printed_devices.add(mac_address)
-                    
-                    # Update devices_info with this device's data (unique by MAC)
-                    devices_info[mac_address] = {
-                        "mac": mac_address,
-                        "signal": signal_value,
-                        "last_seen": current_time,
-                        "vendor": VENDOR_MAP.get(mac_prefix, "Unknown")
-                    }
-                    
-                    # Also update global sets/deques for plotting if needed.
-                    detected_devices.add(mac_address)
-                    device_counts.append(len(detected_devices))
-                    wifi_strengths.append(signal_value)
-            except pexpect.exceptions.TIMEOUT:
-                if DEBUG:
-                    print("[ERROR] tcpdump timeout.")
-                continue
+                # Only the 17-byte MAC is ever decoded; the line itself stays bytes
+                mac_address = mac_raw.translate(_LOWER).decode("ascii")
+                prefix_int = mac_int >> 24
+                
+                # # Filter based on allowed prefixes
+                # if prefix_int not in ALLOWED_INT:
+                #     continue
+                
+                current_time = now()
+                vendor = vendor_get(prefix_int, "Unknown")
+                
+                # Only print if this device hasn't been printed before
+                if secure_location_enabled:
+                    # if mac_address not in printed_devices:
+                    # None for untrusted devices; names and membership come from one snapshot
+                    trusted_name = _trusted_snapshot.get(mac_address)
+                    log_put((trusted_name, mac_address, vendor, signal_value, current_time))
+                    remember(printed, mac_address, None)
+                
+                # Update devices_info with this device's data (unique by MAC)
+                remember(info, mac_address, {
+                    "mac": mac_address,
+                    "signal": signal_value,
+                    "last_seen": current_time,
+                    "vendor": vendor
+                })
             except Exception as e:
                 if DEBUG:
                     print(f"[ERROR] Exception in tcpdump thread: {e}")
                 break
-    except pexpect.exceptions.EOF:
-        if DEBUG:
-            print("[ERROR] tcpdump EOF encountered.")
+        proc.terminate()
     except Exception as e:
         if DEBUG:
             print(f"[ERROR] Exception starting tcpdump: {e}")
 
+def log_worker():
+    """
+    Formats, prints and publishes detections queued by run_tcpdump, so message
+    formatting and console/MQTT I/O never stall packet parsing.
+    """
+    while not stop_event.is_set():
+        try:
+            trusted_name, mac_address, vendor, signal_value, current_time = _log_q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        time_str = _ctime_cached(current_time)
+        if trusted_name is None:
+            message = _NOT_TRUSTED_FMT % (mac_address, vendor, signal_value, time_str)
+        else:
+            message = _TRUSTED_FMT % (mac_address, trusted_name, vendor, signal_value, time_str)
+        print(message)
+        publish_log(message)
+
 def webcam_feed():
     """
     Continuously captures frames from the webcam and updates the global 'frame' variable.
     """
-    global frame, stop_threads
+    global frame
     if DEBUG:
         print("[DEBUG] Starting webcam feed thread...")
+    width = WEBCAM_CONFIG['frame_width']
+    height = WEBCAM_CONFIG['frame_height']
     cap = cv2.VideoCapture(WEBCAM_CONFIG['device_index'])
-    while not stop_threads:
+    # Ask the driver for compressed MJPG at the target size and frame rate, and
+    # to keep only the latest frame. FOURCC is set first, as some backends only
+    # accept the size once the format is chosen.
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, WEBCAM_CONFIG['fps'])
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    failures = 0
+    while not stop_event.is_set():
         ret, new_frame = cap.read()
         if ret:
-            frame = cv2.resize(new_frame, (WEBCAM_CONFIG['frame_width'], WEBCAM_CONFIG['frame_height']))
+            failures = 0
+            # cap.read() returns a fresh array, so publishing it is a single atomic
+            # reference swap and readers never see a partially written frame.
+            if new_frame.shape[1] == width and new_frame.shape[0] == height:
+                frame = new_frame
+            else:
+                # Driver rejected the requested size; resize via OpenCL (UMat)
+                frame = cv2.resize(cv2.UMat(new_frame), (width, height)).get()
+            frame_ready.set()
         else:
             if DEBUG:
                 print("[ERROR] Failed to capture webcam frame.")
+            failures += 1
+            if failures > WEBCAM_CONFIG['max_failures']:
+                if DEBUG:
+                    print("[ERROR] Too many failed captures, stopping webcam feed.")
+                break
+            stop_event.wait(WEBCAM_CONFIG['retry_delay'])
     cap.release()
     if DEBUG:
         print("[DEBUG] Webcam feed thread terminated.")
 
+def shutdown():
+    """
+    Signals all background threads to stop and unblocks tcpdump's pending read
+    by terminating it. The webcam is left to webcam_feed(), which releases it
+    after its current read of at most one frame period.
+    """
+    stop_event.set()
+    if _tcpdump_proc is not None:
+        _tcpdump_proc.terminate()
+
 if __name__ == '__main__':
     pass
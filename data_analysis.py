@@ -19,13 +19,21 @@ Each message is parsed into its two sections, and the resulting data is appended
 
 import paho.mqtt.client as mqtt
 import os
-import csv
+import io
+import atexit
 import re
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.lines import Line2D
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from statsmodels.tsa.arima.model import ARIMA
@@ -39,11 +47,216 @@ MQTT_TOPIC = 'iot/detection'
 FREE_SPACE_CSV = "free_space_detection.csv"
 WIFI_CSV = "wifi_detection.csv"
 
+# ================= CSV COLUMNS =================
+FREE_SPACE_COLS = ["timestamp", "frame_differencing", "background_subtraction",
+                   "contour_detection", "ssim", "mean"]
+WIFI_COLS = ["timestamp", "mac", "vendor", "trusted_name", "signal", "status"]
+WIFI_STATUS_DTYPE = pd.CategoricalDtype(["TRUSTED", "NOT TRUSTED"])
+
+# Column types of the Wi-Fi CSV; repeated strings are stored as categories
+WIFI_DTYPE = {"mac": "category", "vendor": "category", "trusted_name": "string",
+              "signal": "int16", "status": WIFI_STATUS_DTYPE}
+
+# Format of the timestamp column in both CSV files
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Flush the CSV files after this many processed messages. The GUI only sees rows
+# once they are flushed, so values above 1 trade display latency for fewer writes.
+CSV_FLUSH_EVERY = 1
+
+# Numeric columns of the free space CSV
+FREE_SPACE_DTYPE = {col: "float64" for col in FREE_SPACE_COLS[1:]}
+
+# ================= MESSAGE PATTERNS =================
+# One "<Method>: <value>%" entry of the free space detection results
+FREE_SPACE_RE = re.compile(
+    r"(Frame Differencing|Background Subtraction|Contour Detection|SSIM|Mean of Enabled Methods):\s*([\d.]+)%")
+FREE_SPACE_KEYS = {
+    "Frame Differencing": "frame_differencing",
+    "Background Subtraction": "background_subtraction",
+    "Contour Detection": "contour_detection",
+    "SSIM": "ssim",
+    "Mean of Enabled Methods": "mean",
+}
+# One "[STATUS] MAC: ..., [Name: ...,] Vendor: ..., Signal: ... dBm, Time: ..." line.
+# Captured text never contains a comma, quote or line break (\n or \r), so it can go
+# into the CSV unquoted.
+WIFI_RE = re.compile(
+    r"^[ \t]*\[(?P<status>[^\],\"\r\n]*)\][^\n]*?MAC:\s*(?P<mac>[0-9a-fA-F:]+)"
+    r"(?:[^\n]*?Name:[ \t]*(?P<name>[^,\"\r\n]+))?"
+    r"[^\n]*?Vendor:[ \t]*(?P<vendor>[^,\"\r\n]+)"
+    r"[^\n]*?Signal:[ \t]*(?P<signal>-?\d+)[ \t]*dBm"
+    r"[^\n]*?Time:[ \t]*(?P<time>[^,\"\r\n]*)",
+    re.MULTILINE)
+
+# Month abbreviations used by time.ctime()
+_MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+           "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
 # ================= DEBUG SETTING =================
 DEBUG = False  # Set to True to enable debug prints
 
-# Update interval in milliseconds
-UPDATE_INTERVAL = 10
+# Interval in milliseconds between checks for new data to redraw
+UPDATE_INTERVAL = 200
+
+# Only the most recent data is kept in memory and plotted
+PLOT_WINDOW = pd.Timedelta(minutes=10)
+
+# ARIMA forecast settings
+FORECAST_STEPS = 100          # Number of 1-second steps to forecast
+FORECAST_REFIT_INTERVAL = 30  # Seconds between full refits of the model parameters
+FORECAST_REFIT_ROWS = 60      # New free space rows that also trigger a full refit
+FORECAST_MAX_SAMPLES = 500    # Most recent samples used to fit the model
+
+# Number of distinct colours used for untrusted devices in Tab 1
+TAB1_COLORS = 20
+
+# Raw MQTT payloads waiting to be processed, and the most to process at once
+message_queue = queue.Queue()
+MESSAGE_BATCH_SIZE = 100
+
+# Rows flushed to the CSV files, handed to the GUI as (free_space_rows, wifi_rows)
+# so it never has to parse the CSV text again after loading it at startup
+flushed_rows = queue.SimpleQueue()
+
+# Held while a batch is written; lets the GUI load the CSV history and discard
+# the already-flushed queued rows without racing the writer
+store_lock = threading.Lock()
+
+# Set by the MQTT subscriber after new data has been written to the CSV files
+data_changed = threading.Event()
+
+class CsvTail:
+    """
+    Keeps an in-memory DataFrame of a CSV file that only grows by appends.
+    Each poll() parses just the complete rows written since the previous poll,
+    instead of re-reading the whole file. Rows already parsed elsewhere can be
+    added with extend() without going through the file at all. If a window is
+    given, only rows within that long of the newest timestamp are kept.
+    """
+    def __init__(self, path, columns, dtype=None, count_column=None, window=None):
+        self.path = path
+        self.columns = columns
+        self.dtype = dtype
+        self.count_column = count_column
+        self.window = window
+        self.offset = 0   # Byte offset just past the last parsed row
+        self.df = None    # None until the file has been seen
+        self.error = None # Exception that stopped the existing rows from loading, if any
+        self.counts = {}  # Running value counts of count_column, updated per poll
+        self.rows_read = 0  # Total rows parsed so far, including rows outside the window
+
+    def poll(self):
+        """Reads newly appended rows. Returns True if any new rows were added."""
+        if not os.path.exists(self.path):
+            return False
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # File was truncated or recreated; start over
+            self.offset = 0
+            self.df = None
+            self.counts = {}
+        if size == self.offset and self.df is not None:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        # Only parse up to the last newline; a row may still be half written
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            if self.df is None:
+                self.df = pd.DataFrame(columns=self.columns)
+            return False
+        try:
+            new_rows = pd.read_csv(io.BytesIO(chunk[:end]), header=0 if self.offset == 0 else None,
+                                   names=self.columns, dtype=self.dtype, engine="c")
+        except Exception as e:
+            self.error = e
+            raise
+        self.offset += end
+        return self._add(new_rows)
+
+    def extend(self, rows):
+        """
+        Adds rows given as tuples in column order. Returns True if any were added.
+        Rows only come from the writer once it has created the file, so an empty
+        list still marks the file as seen.
+        """
+        if not rows:
+            if self.df is None:
+                self.df = pd.DataFrame(columns=self.columns)
+            return False
+        new_rows = pd.DataFrame.from_records(rows, columns=self.columns)
+        if self.dtype is not None:
+            new_rows = new_rows.astype(self.dtype)
+        return self._add(new_rows)
+
+    def _add(self, new_rows):
+        """Appends parsed rows to the DataFrame, updating the counts and window."""
+        new_rows["timestamp"] = pd.to_datetime(new_rows["timestamp"], format=TIMESTAMP_FORMAT,
+                                               errors="coerce")
+        self.rows_read += len(new_rows)
+        if self.count_column is not None:
+            for value, count in new_rows[self.count_column].value_counts().items():
+                self.counts[value] = self.counts.get(value, 0) + count
+        if self.df is None or self.df.empty:
+            self.df = new_rows
+        else:
+            # Concatenating categoricals with different categories falls back to
+            # object columns, so give both sides the union of their categories
+            for col in new_rows.select_dtypes("category").columns:
+                categories = self.df[col].cat.categories.union(new_rows[col].cat.categories)
+                self.df[col] = self.df[col].cat.set_categories(categories)
+                new_rows[col] = new_rows[col].cat.set_categories(categories)
+            self.df = pd.concat([self.df, new_rows], ignore_index=True, copy=False)
+        if self.window is not None and not self.df.empty:
+            cutoff = self.df["timestamp"].max() - self.window
+            self.df = self.df.loc[self.df["timestamp"] >= cutoff].reset_index(drop=True)
+            # Forget categories (e.g. MACs) that only appeared in dropped rows
+            for col in self.df.select_dtypes("category").columns:
+                if col != self.count_column:
+                    self.df[col] = self.df[col].cat.remove_unused_categories()
+        return not new_rows.empty
+
+    def data(self):
+        """Returns the DataFrame, or raises the error that stopped the file from loading."""
+        if self.error is not None:
+            raise self.error
+        return self.df
+
+class Blitter:
+    """
+    Redraws a set of animated artists on a canvas with blitting. Everything
+    else on the figure is rendered once into a cached background, which is
+    refreshed whenever the canvas is fully redrawn (e.g. on resize).
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.background = None
+        self.artists = []
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def add(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def update(self, relayout=False):
+        """Blits the animated artists, or fully redraws if the layout changed."""
+        if relayout or self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+            self.canvas.blit(self.canvas.figure.bbox)
 
 class DataAnalysisGUI:
     def __init__(self, master):
@@ -72,6 +285,20 @@ class DataAnalysisGUI:
         self.canvas1 = FigureCanvasTkAgg(self.fig1, master=self.tab1)
         self.canvas1.get_tk_widget().pack(fill="both", expand=True)
         # self.fig1.tight_layout()
+        self.ax1.set_title("Wi-Fi Signal Strength Over Time")
+        self.ax1.set_xlabel("Time")
+        self.ax1.set_ylabel("Signal (dBm)")
+        self.ax1.xaxis_date()
+        self._ax1_msg = self.ax1.text(0.5, 0.5, "", ha="center", va="center", transform=self.ax1.transAxes)
+        # Two collections hold every point: untrusted devices coloured by MAC code
+        # (cycling through TAB1_COLORS colours) and trusted devices in green
+        self._ax1_untrusted = self.ax1.scatter(np.empty(0), np.empty(0), c=np.empty(0), cmap="tab20",
+                                               vmin=0, vmax=TAB1_COLORS - 1, s=20, alpha=0.7)
+        self._ax1_trusted = self.ax1.scatter(np.empty(0), np.empty(0), s=50, color="green", alpha=0.9)
+        self._ax1_legend_key = None
+        self._blit1 = Blitter(self.canvas1)
+        self._blit1.add(self._ax1_untrusted)
+        self._blit1.add(self._ax1_trusted)
         
         # ----------------- Tab 2: Free Space Detection Trend -----------------
         self.fig2 = Figure(figsize=(5, 4), dpi=100)
@@ -84,6 +311,21 @@ class DataAnalysisGUI:
         self.ax3 = self.fig3.add_subplot(111)
         self.canvas3 = FigureCanvasTkAgg(self.fig3, master=self.tab3)
         self.canvas3.get_tk_widget().pack(fill="both", expand=True)
+        self.ax3.xaxis_date()
+        self._ax3_line, = self.ax3.plot(
+            [], [],
+            marker='o',         # Optional: puts a dot at each data point
+            linestyle='-',      # Connect dots with a line
+            color='blue',
+            alpha=0.7,
+            label="Device Count"
+        )
+        # Improve X-axis readability
+        self.ax3.xaxis.set_major_locator(plt.MaxNLocator(nbins=10))
+        self.ax3.tick_params(axis="x", rotation=45)
+        self._ax3_msg = self.ax3.text(0.5, 0.5, "", ha="center", va="center", transform=self.ax3.transAxes)
+        self._blit3 = Blitter(self.canvas3)
+        self._blit3.add(self._ax3_line)
         
         # ----------------- Tab 4: Trusted vs Untrusted Devices -----------------
         self.fig4 = Figure(figsize=(5, 4), dpi=100)
@@ -95,175 +337,310 @@ class DataAnalysisGUI:
         exit_button = tk.Button(master, text="Exit", command=master.quit)
         exit_button.pack(side="bottom", pady=5)
         
-        # Start updating plots
+        # In-memory copies of both CSV files, loaded once and then extended with
+        # the rows the subscriber hands over
+        self._wifi = CsvTail(WIFI_CSV, WIFI_COLS, dtype=WIFI_DTYPE, count_column="status",
+                             window=PLOT_WINDOW)
+        self._free = CsvTail(FREE_SPACE_CSV, FREE_SPACE_COLS, dtype=FREE_SPACE_DTYPE, window=PLOT_WINDOW)
+        self._load_history()
+        
+        # ARIMA fits run on a single background worker; the latest result is cached.
+        # Between full refits, new data is filtered through the saved parameters.
+        self._forecast_executor = ThreadPoolExecutor(max_workers=1)
+        self._forecast_future = None
+        self._forecast_rows = 0          # Value of self._free.rows_read at the latest forecast
+        self._cached_forecast = None     # (future_timestamps, forecast) or None
+        self._arima_fit = None           # Results of the latest fit, or None
+        self._arima_fit_rows = 0         # Value of self._free.rows_read at the latest full fit
+        self._arima_last_fit_t = 0.0     # time.monotonic() of the latest full fit
+        
+        # Tabs whose canvas no longer reflects the cached data
+        self._stale_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change)
+        
+        # Draw once, then redraw only when the subscriber reports new data
         self.update_plots()
+        self.master.after(UPDATE_INTERVAL, self._maybe_redraw)
+    
+    def _maybe_redraw(self):
+        """Redraws the plots if new data has arrived since the last redraw."""
+        if data_changed.is_set():
+            data_changed.clear()
+            self.update_plots()
+        self.master.after(UPDATE_INTERVAL, self._maybe_redraw)
+    
+    def _load_history(self):
+        """
+        Reads the rows already in both CSV files. Queued rows are all in the
+        files by then, so they are dropped rather than added twice.
+        """
+        with store_lock:
+            try:
+                self._wifi.poll()
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error reading Wi-Fi CSV:", e)
+            try:
+                self._free.poll()
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error reading Free Space CSV:", e)
+            try:
+                while True:
+                    flushed_rows.get_nowait()
+            except queue.Empty:
+                pass
     
     def update_plots(self):
-        """Reads CSV files and updates the four plots."""
-        # Clear all axes
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
-        self.ax4.clear()
+        """Adds the rows flushed since the last update and redraws the visible tab."""
+        free_rows, wifi_rows = [], []
+        flushed = False
+        try:
+            while True:
+                batch_free, batch_wifi = flushed_rows.get_nowait()
+                free_rows += batch_free
+                wifi_rows += batch_wifi
+                flushed = True
+        except queue.Empty:
+            pass
+        # Both files exist once anything has been flushed, even if all rows were of one kind
+        if flushed:
+            try:
+                self._wifi.extend(wifi_rows)
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error adding Wi-Fi rows:", e)
+            try:
+                self._free.extend(free_rows)
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error adding Free Space rows:", e)
+        
+        # Only the visible tab is redrawn now; the others are redrawn when selected
+        self._stale_tabs = {0, 1, 2, 3}
+        self._draw_tab(self.notebook.index("current"))
+    
+    def _on_tab_change(self, event):
+        """Redraws the newly selected tab if data has changed since it was last drawn."""
+        tab = self.notebook.index("current")
+        if tab in self._stale_tabs:
+            self._draw_tab(tab, relayout=True)
+    
+    def _draw_tab(self, tab, relayout=False):
+        """Redraws one tab from the cached data."""
+        self._stale_tabs.discard(tab)
         
         # -------------- Tab 1: Wi-Fi Signal Strength Over Time --------------
-        try:
-            if os.path.exists(WIFI_CSV):
-                wifi_df = pd.read_csv(WIFI_CSV, parse_dates=["timestamp"])
-                if not wifi_df.empty:
-                    # Group by MAC address and plot each line
-                    # Group by MAC address and plot each line
-                    for mac, group in wifi_df.groupby("mac"):
-                        group = group.sort_values("timestamp")
-
-                        # Check if the device is trusted
-                        trusted_name = group["trusted_name"].iloc[0] if group["status"].iloc[0] == "TRUSTED" and group["trusted_name"].iloc[0] else None
-                        
-                        if trusted_name:
-                            # Use a thick red line for trusted devices and display their names in the legend
-                            self.ax1.scatter(group["timestamp"], group["signal"], label=f"{trusted_name} (Trusted)", s=50, color="green", alpha=0.9)
-                        else:
-                            # Normal plot for untrusted devices
-                            self.ax1.scatter(group["timestamp"], group["signal"], label=mac, s=20, alpha=0.7)
-                    self.ax1.set_title("Wi-Fi Signal Strength Over Time")
-                    self.ax1.set_xlabel("Time")
-                    self.ax1.set_ylabel("Signal (dBm)")
-                    self.ax1.legend(
-                        fontsize='small',
-                        bbox_to_anchor=(1.02, 1),  # Position outside plot
-                        loc='upper left',
-                        borderaxespad=0,
-                        title="Devices"
-                    )
-                else:
-                    self.ax1.text(0.5, 0.5, "No Wi-Fi Data", ha="center", va="center")
-            else:
-                self.ax1.text(0.5, 0.5, "Wi-Fi CSV Not Found", ha="center", va="center")
-        except Exception as e:
-            if DEBUG:
-                print("[DEBUG] Error in Tab 1:", e)
-            self.ax1.text(0.5, 0.5, "Error loading Wi-Fi data", ha="center", va="center")
+        if tab == 0:
+            try:
+                self._update_tab1(self._wifi.data(), relayout)
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error in Tab 1:", e)
+                self._ax1_msg.set_text("Error loading Wi-Fi data")
+                self._blit1.update(relayout=True)
         
         # -------------- Tab 2: Free Space Detection Trend --------------
-        try:
-            if os.path.exists(FREE_SPACE_CSV):
-                free_df = pd.read_csv(FREE_SPACE_CSV, parse_dates=["timestamp"])
-                if not free_df.empty:
-                    free_df = free_df.sort_values("timestamp")
-                    self.forecast_free_space()
-                    self.canvas2.draw()
-                    self.ax2.set_title("Free Space Detection Trend")
-                    self.ax2.set_xlabel("Time")
-                    self.ax2.set_ylabel("Mean Detection (%)")
+        elif tab == 1:
+            # Rebuilt from scratch on every redraw
+            self.ax2.clear()
+            try:
+                free_df = self._free.data()
+                if free_df is not None:
+                    if not free_df.empty:
+                        self.forecast_free_space()
+                        self.ax2.set_title("Free Space Detection Trend")
+                        self.ax2.set_xlabel("Time")
+                        self.ax2.set_ylabel("Mean Detection (%)")
+                    else:
+                        self.ax2.text(0.5, 0.5, "No Free Space Data", ha="center", va="center")
                 else:
-                    self.ax2.text(0.5, 0.5, "No Free Space Data", ha="center", va="center")
-            else:
-                self.ax2.text(0.5, 0.5, "Free Space CSV Not Found", ha="center", va="center")
-        except Exception as e:
-            if DEBUG:
-                print("[DEBUG] Error in Tab 2:", e)
-            self.ax2.text(0.5, 0.5, "Error loading Free Space data", ha="center", va="center")
+                    self.ax2.text(0.5, 0.5, "Free Space CSV Not Found", ha="center", va="center")
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error in Tab 2:", e)
+                self.ax2.text(0.5, 0.5, "Error loading Free Space data", ha="center", va="center")
+            self.canvas2.draw()
         
         # -------------- Tab 3: Device Count Over Time --------------
-        try:
-            if os.path.exists(WIFI_CSV):
-                wifi_df = pd.read_csv(WIFI_CSV, parse_dates=["timestamp"])
-                if not wifi_df.empty:
-                    # Group data into 5-second intervals
-                    wifi_df["time_bucket"] = wifi_df["timestamp"].dt.floor("s")
-                    count_series = wifi_df.groupby("time_bucket").size().sort_index()
-
-                    if not count_series.empty:
-                        # self.ax3.bar(count_series.index, count_series.values,
-                        #     width=0.00005,  # ~5 seconds in days
-                        #     color="blue", alpha=0.7,
-                        #     label="Device Count", align="center")
-                        # self.ax3.set_title("Device Count Over Time")
-                        # self.ax3.set_xlabel("Time")
-                        # self.ax3.set_ylabel("Count")
-                        # self.ax3.legend()
-                        self.ax3.plot(
-                            count_series.index,
-                            count_series.values,
-                            marker='o',         # Optional: puts a dot at each data point
-                            linestyle='-',      # Connect dots with a line
-                            color='blue',
-                            alpha=0.7,
-                            label="Device Count"
-                        )
-                        # Improve X-axis readability
-                        self.ax3.xaxis.set_major_locator(plt.MaxNLocator(nbins=10))
-                        self.ax3.tick_params(axis="x", rotation=45)
-                    else:
-                        self.ax3.text(0.5, 0.5, "No Device Data", ha="center", va="center")
-            else:
-                self.ax3.text(0.5, 0.5, "Wi-Fi CSV Not Found", ha="center", va="center")
-        except Exception as e:
-            if DEBUG:
-                print("[DEBUG] Error in Tab 3:", e)
-            self.ax3.text(0.5, 0.5, "Error loading Device Count data", ha="center", va="center")
-
+        elif tab == 2:
+            try:
+                self._update_tab3(self._wifi.data(), relayout)
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error in Tab 3:", e)
+                self._ax3_msg.set_text("Error loading Device Count data")
+                self._blit3.update(relayout=True)
+        
         # -------------- Tab 4: Trusted vs Untrusted Devices (Pie Chart) --------------
-        try:
-            if os.path.exists(WIFI_CSV):
-                wifi_df = pd.read_csv(WIFI_CSV)
-                if not wifi_df.empty:
-                    # Count trusted and not trusted devices based on the status column
-                    trusted_count = wifi_df[wifi_df["status"].str.contains("TRUSTED", case=False)].shape[0]
-                    not_trusted_count = wifi_df[wifi_df["status"].str.contains("NOT TRUSTED", case=False)].shape[0]
-                    counts = [trusted_count, not_trusted_count]
-                    labels = ["Trusted", "Not Trusted"]
-                    self.ax4.pie(counts, labels=labels, autopct='%1.1f%%', startangle=90)
-                    self.ax4.set_title("Trusted vs Untrusted Devices")
+        elif tab == 3:
+            # Rebuilt from scratch on every redraw
+            self.ax4.clear()
+            try:
+                wifi_df = self._wifi.data()
+                if wifi_df is not None:
+                    if not wifi_df.empty:
+                        # Trusted and not trusted counts are kept up to date as rows are read
+                        status_counts = self._wifi.counts
+                        counts = [status_counts.get("TRUSTED", 0), status_counts.get("NOT TRUSTED", 0)]
+                        labels = ["Trusted", "Not Trusted"]
+                        self.ax4.pie(counts, labels=labels, autopct='%1.1f%%', startangle=90)
+                        self.ax4.set_title("Trusted vs Untrusted Devices")
+                    else:
+                        self.ax4.text(0.5, 0.5, "No Wi-Fi Data", ha="center", va="center")
                 else:
-                    self.ax4.text(0.5, 0.5, "No Wi-Fi Data", ha="center", va="center")
-            else:
-                self.ax4.text(0.5, 0.5, "Wi-Fi CSV Not Found", ha="center", va="center")
-        except Exception as e:
-            if DEBUG:
-                print("[DEBUG] Error in Tab 4:", e)
-            self.ax4.text(0.5, 0.5, "Error loading Pie Chart data", ha="center", va="center")
+                    self.ax4.text(0.5, 0.5, "Wi-Fi CSV Not Found", ha="center", va="center")
+            except Exception as e:
+                if DEBUG:
+                    print("[DEBUG] Error in Tab 4:", e)
+                self.ax4.text(0.5, 0.5, "Error loading Pie Chart data", ha="center", va="center")
+            self.canvas4.draw()
+    
+    def _update_tab1(self, wifi_df, relayout=False):
+        """
+        Updates the Tab 1 scatter plots in place. All untrusted points live in one
+        collection coloured by MAC and all trusted points in another. The figure is
+        only fully redrawn when the legend, the axis limits or the status message
+        change; otherwise the scatters are blitted over the cached background.
+        """
+        if wifi_df is None:
+            message = "Wi-Fi CSV Not Found"
+        elif wifi_df.empty:
+            message = "No Wi-Fi Data"
+        else:
+            message = ""
+        relayout = relayout or message != self._ax1_msg.get_text()
+        self._ax1_msg.set_text(message)
+        
+        legend_key = ()
+        if message:
+            self._ax1_untrusted.set_offsets(np.empty((0, 2)))
+            self._ax1_untrusted.set_array(np.empty(0))
+            self._ax1_trusted.set_offsets(np.empty((0, 2)))
+        else:
+            points = np.column_stack((mdates.date2num(wifi_df["timestamp"].to_numpy()),
+                                      wifi_df["signal"].to_numpy()))
+            macs = wifi_df["mac"].astype("category")
+            mac_codes = macs.cat.codes.to_numpy() % TAB1_COLORS
+            names = wifi_df["trusted_name"].fillna("").astype(str)
+            # A point is trusted if it was logged as TRUSTED with a trusted name
+            trusted = (wifi_df["status"].eq("TRUSTED") & names.ne("")).to_numpy()
+            
+            self._ax1_untrusted.set_offsets(points[~trusted])
+            self._ax1_untrusted.set_array(mac_codes[~trusted])
+            self._ax1_trusted.set_offsets(points[trusted])
+            
+            # Autoscale to the data (collections are not covered by relim)
+            old_limits = (self.ax1.get_xlim(), self.ax1.get_ylim())
+            self.ax1.ignore_existing_data_limits = True
+            self.ax1.update_datalim(points)
+            self.ax1.autoscale_view()
+            relayout = relayout or old_limits != (self.ax1.get_xlim(), self.ax1.get_ylim())
+            
+            # Legend: one entry per untrusted MAC (in MAC order) and per trusted name.
+            # The MAC codes fix the colours, so they are part of the key.
+            untrusted_codes = tuple(np.unique(macs.cat.codes.to_numpy()[~trusted]).tolist())
+            legend_key = (untrusted_codes, tuple(macs.cat.categories[list(untrusted_codes)]),
+                          tuple(sorted(names[trusted].unique())))
+        
+        # The legend is only rebuilt when the set of devices changes. It uses
+        # non-animated proxies so it is part of the cached background.
+        if legend_key != self._ax1_legend_key:
+            self._ax1_legend_key = legend_key
+            legend = self.ax1.get_legend()
+            if legend is not None:
+                legend.remove()
+            if any(legend_key):
+                codes, untrusted_macs, trusted_names = legend_key
+                legend_entries = [(mac, self._ax1_untrusted.to_rgba(code % TAB1_COLORS))
+                                  for code, mac in zip(codes, untrusted_macs)]
+                legend_entries += [(f"{name} (Trusted)", "green") for name in trusted_names]
+                handles = [Line2D([], [], linestyle="", marker="o", color=color, label=label)
+                           for label, color in legend_entries]
+                self.ax1.legend(
+                    handles=handles,
+                    fontsize='small',
+                    bbox_to_anchor=(1.02, 1),  # Position outside plot
+                    loc='upper left',
+                    borderaxespad=0,
+                    title="Devices"
+                )
+            relayout = True
+        
+        self._blit1.update(relayout)
+    
+    def _update_tab3(self, wifi_df, relayout=False):
+        """
+        Updates the Tab 3 device count line in place, blitting it unless the
+        axis limits or the status message changed.
+        """
+        secs = None
+        if wifi_df is None:
+            message = "Wi-Fi CSV Not Found"
+        else:
+            # Whole seconds since the epoch of every detection
+            secs = wifi_df["timestamp"].dropna().to_numpy().astype("datetime64[s]").astype(np.int64)
+            message = "" if secs.size else "No Device Data"
+        relayout = relayout or message != self._ax3_msg.get_text()
+        self._ax3_msg.set_text(message)
         
-        # Redraw all canvases
-        self.canvas1.draw()
-        self.canvas2.draw()
-        self.canvas3.draw()
-        self.canvas4.draw()
+        if message:
+            self._ax3_line.set_data([], [])
+        else:
+            # Count detections in 1-second intervals
+            first = secs.min()
+            counts = np.bincount(secs - first)
+            seconds = (first + np.arange(counts.size)).astype("datetime64[s]")
+            self._ax3_line.set_data(mdates.date2num(seconds), counts)
+            old_limits = (self.ax3.get_xlim(), self.ax3.get_ylim())
+            self.ax3.relim()
+            self.ax3.autoscale_view()
+            relayout = relayout or old_limits != (self.ax3.get_xlim(), self.ax3.get_ylim())
         
-        # Schedule the next update
-        self.master.after(UPDATE_INTERVAL, self.update_plots)
+        self._blit3.update(relayout)
         
     def forecast_free_space(self):
         """
-        Reads past free space detection data and applies ARIMA to forecast future occupancy levels.
+        Plots the cached free space detection data with the most recent ARIMA forecast
+        of future occupancy levels. The model is fitted on a background worker once
+        enough new rows have arrived, so the GUI never waits on the fit.
         """
         try:
-            if os.path.exists(FREE_SPACE_CSV):
-                free_df = pd.read_csv(FREE_SPACE_CSV, parse_dates=["timestamp"])
-                free_df["timestamp"] = pd.to_datetime(free_df["timestamp"])
+            free_df = self._free.df
+            if free_df is not None:
                 if not free_df.empty:
                     free_df = free_df.sort_values("timestamp")
 
                     # Ensure enough data points for ARIMA
                     if len(free_df) > 10:
                     # if len(free_df) > 10 and free_df["mean"].notna().sum() > 10:
-                        # Fit ARIMA model (Auto-Regressive=2, Differencing=1, Moving Average=2)
-                        model = ARIMA(free_df["mean"], order=(3, 2, 3), enforce_stationarity=False, enforce_invertibility=False)
-                        model_fit = model.fit()
-
-                        # Forecast next 5 intervals
-                        forecast_steps = 100
-                        forecast = model_fit.forecast(steps=forecast_steps)
-
-                        # Generate future timestamps
-                        last_timestamp = free_df["timestamp"].iloc[-1]
-                        future_timestamps = pd.date_range(last_timestamp, periods=forecast_steps + 1, freq="s")[1:]
+                        self._collect_forecast()
+                        rows_read = self._free.rows_read
+                        if self._forecast_future is None and rows_read > self._forecast_rows:
+                            self._forecast_rows = rows_read
+                            mean_values = free_df["mean"].iloc[-FORECAST_MAX_SAMPLES:].to_numpy()
+                            last_timestamp = free_df["timestamp"].iloc[-1]
+                            now = time.monotonic()
+                            if (self._arima_fit is None
+                                    or now - self._arima_last_fit_t >= FORECAST_REFIT_INTERVAL
+                                    or rows_read - self._arima_fit_rows >= FORECAST_REFIT_ROWS):
+                                self._arima_fit_rows = rows_read
+                                self._arima_last_fit_t = now
+                                self._forecast_future = self._forecast_executor.submit(
+                                    self._fit_forecast, mean_values, last_timestamp)
+                            else:
+                                self._forecast_future = self._forecast_executor.submit(
+                                    self._apply_forecast, self._arima_fit, mean_values, last_timestamp)
+                            # Redraw as soon as the new forecast is ready
+                            self._forecast_future.add_done_callback(lambda _: data_changed.set())
 
                         # Plot actual data
                         self.ax2.plot(free_df["timestamp"], free_df["mean"], linestyle="-", color="black", label="Actual")
 
                         # Plot forecasted data
-                        self.ax2.plot(future_timestamps, forecast, linestyle="--", color="red", label="Forecast")
+                        if self._cached_forecast is not None:
+                            future_timestamps, forecast = self._cached_forecast
+                            self.ax2.plot(future_timestamps, forecast, linestyle="--", color="red", label="Forecast")
 
                         self.ax2.set_title("Free Space Detection Trend (with Forecast)")
                         self.ax2.set_xlabel("Time")
@@ -277,11 +654,57 @@ class DataAnalysisGUI:
             if DEBUG:
                 print("[DEBUG] Error in forecasting free space:", e)
             self.ax2.text(0.5, 0.5, "Error loading forecast data", ha="center", va="center")
+    
+    def _collect_forecast(self):
+        """Stores the result of a finished background fit, if there is one."""
+        if self._forecast_future is None or not self._forecast_future.done():
+            return
+        future, self._forecast_future = self._forecast_future, None
+        try:
+            model_fit, future_timestamps, forecast = future.result()
+            self._arima_fit = model_fit
+            self._cached_forecast = (future_timestamps, forecast)
+        except Exception as e:
+            if DEBUG:
+                print("[DEBUG] ARIMA fit failed:", e)
+    
+    @staticmethod
+    def _fit_forecast(mean_values, last_timestamp):
+        """
+        Fits ARIMA to the mean detection values and forecasts FORECAST_STEPS seconds
+        past last_timestamp. Runs on the forecast worker thread.
+        Returns (model_fit, future_timestamps, forecast).
+        """
+        # Fit ARIMA model (Auto-Regressive=3, Differencing=2, Moving Average=3)
+        model = ARIMA(mean_values, order=(3, 2, 3), enforce_stationarity=False, enforce_invertibility=False)
+        model_fit = model.fit()
+        return DataAnalysisGUI._forecast_from(model_fit, last_timestamp)
+    
+    @staticmethod
+    def _apply_forecast(model_fit, mean_values, last_timestamp):
+        """
+        Runs the mean detection values through the parameters of an earlier fit,
+        without re-estimating them, and forecasts from the end of the new data.
+        Runs on the forecast worker thread.
+        Returns (model_fit, future_timestamps, forecast).
+        """
+        model_fit = model_fit.apply(mean_values, refit=False)
+        return DataAnalysisGUI._forecast_from(model_fit, last_timestamp)
+    
+    @staticmethod
+    def _forecast_from(model_fit, last_timestamp):
+        """Forecasts FORECAST_STEPS seconds past last_timestamp from a fitted model."""
+        forecast = model_fit.forecast(steps=FORECAST_STEPS)
+
+        # Generate future timestamps
+        future_timestamps = (np.datetime64(last_timestamp, "ns")
+                             + np.arange(1, FORECAST_STEPS + 1) * np.timedelta64(1, "s"))
+        return model_fit, future_timestamps, forecast
 
 # ================= HELPER FUNCTIONS =================
-def parse_free_space_detection(lines):
+def parse_free_space_detection(raw_text):
     """
-    Parses free space detection lines and extracts detection percentages.
+    Extracts the free space detection percentages from a raw message.
     Returns a dictionary with keys:
       - frame_differencing
       - background_subtraction
@@ -289,153 +712,158 @@ def parse_free_space_detection(lines):
       - ssim
       - mean
     """
-    result = {}
-    for line in lines:
-        if "Frame Differencing:" in line:
-            match = re.search(r"Frame Differencing:\s*([\d.]+)%", line)
-            if match:
-                result["frame_differencing"] = float(match.group(1))
-        elif "Background Subtraction:" in line:
-            match = re.search(r"Background Subtraction:\s*([\d.]+)%", line)
-            if match:
-                result["background_subtraction"] = float(match.group(1))
-        elif "Contour Detection:" in line:
-            match = re.search(r"Contour Detection:\s*([\d.]+)%", line)
-            if match:
-                result["contour_detection"] = float(match.group(1))
-        elif "SSIM:" in line:
-            match = re.search(r"SSIM:\s*([\d.]+)%", line)
-            if match:
-                result["ssim"] = float(match.group(1))
-        elif "Mean of Enabled Methods:" in line:
-            match = re.search(r"Mean of Enabled Methods:\s*([\d.]+)%", line)
-            if match:
-                result["mean"] = float(match.group(1))
+    result = {FREE_SPACE_KEYS[m.group(1)]: float(m.group(2))
+              for m in FREE_SPACE_RE.finditer(raw_text)}
     if DEBUG:
         print("[DEBUG] Parsed free space detection data:", result)
     return result
 
-def parse_wifi_detection(lines):
+def parse_wifi_detection(raw_text):
     """
-    Parses Wi-Fi detection lines and extracts device details.
-    Returns a list of dictionaries, each with keys:
-      - timestamp, mac, vendor, trusted_name, signal, status
+    Extracts the Wi-Fi detection lines from a raw message.
+    Returns a list of tuples in WIFI_COLS order:
+      (timestamp, mac, vendor, trusted_name, signal, status)
     """
     wifi_list = []
-    for line in lines:
-        # Process only lines that start with '[' and contain "MAC:"
-        if line.startswith("[") and "MAC:" in line:
-            status_match = re.match(r"\[(.*?)\]", line)
-            mac_match = re.search(r"MAC:\s*([0-9a-fA-F:]+)", line)
-            vendor_match = re.search(r"Vendor:\s*([^,]+)", line)
-            signal_match = re.search(r"Signal:\s*([-\d]+)\s*dBm", line)
-            time_match = re.search(r"Time:\s*(.*)", line)
-            
-            if status_match and mac_match and vendor_match and signal_match and time_match:
-                status = status_match.group(1).strip()
-                mac = mac_match.group(1).strip()
-                vendor = vendor_match.group(1).strip()
-                signal = int(signal_match.group(1).strip())
-                time_str = time_match.group(1).strip()
-                
-                # Parse time format e.g., "Sat Mar 15 18:47:03 2025"
-                try:
-                    timestamp = datetime.strptime(time_str, "%a %b %d %H:%M:%S %Y")
-                    timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception as e:
-                    if DEBUG:
-                        print(f"[DEBUG] Failed to parse time '{time_str}': {e}")
-                    timestamp_str = time_str
-                
-                # If the device is TRUSTED, try to capture the trusted name (e.g., "Name: John Doe")
-                trusted_name = ""
-                if "TRUSTED" in status.upper():
-                    name_match = re.search(r"Name:\s*([^,]+)", line)
-                    if name_match:
-                        trusted_name = name_match.group(1).strip()
-                
-                wifi_list.append({
-                    "timestamp": timestamp_str,
-                    "mac": mac,
-                    "vendor": vendor,
-                    "trusted_name": trusted_name,
-                    "signal": signal,
-                    "status": status
-                })
+    for m in WIFI_RE.finditer(raw_text):
+        status = m.group("status").strip()
+        time_str = m.group("time").strip()
+        
+        # Parse the fixed ctime format e.g., "Sat Mar 15 18:47:03 2025" by hand;
+        # strptime is far slower for a format that never changes
+        try:
+            _, month, day, clock, year = time_str.split()
+            hour, minute, second = clock.split(":")
+            timestamp_str = (f"{int(year):04d}-{_MONTHS[month]:02d}-{int(day):02d} "
+                             f"{int(hour):02d}:{int(minute):02d}:{int(second):02d}")
+        except Exception as e:
+            if DEBUG:
+                print(f"[DEBUG] Failed to parse time '{time_str}': {e}")
+            timestamp_str = time_str
+        
+        # If the device is TRUSTED, capture the trusted name (e.g., "Name: John Doe")
+        trusted_name = ""
+        if "TRUSTED" in status.upper() and m.group("name"):
+            trusted_name = m.group("name").strip()
+        
+        wifi_list.append((timestamp_str, m.group("mac"), m.group("vendor").strip(),
+                          trusted_name, int(m.group("signal")), status))
     if DEBUG:
         print("[DEBUG] Parsed Wi-Fi detection data:", wifi_list)
     return wifi_list
 
+# Raw append-only descriptors of both CSV files, opened on first use by _ensure_files()
+_free_fd = None
+_wifi_fd = None
+_unflushed_messages = 0
+_unflushed_free_rows = []
+_unflushed_wifi_rows = []
+
+# Line formats of both CSV files. No field can contain a comma, quote, \n or \r
+# (the message patterns exclude them), so rows are written without csv quoting.
+_FREE_SPACE_LINE = ",".join(["%s"] * len(FREE_SPACE_COLS)) + "\n"
+_WIFI_LINE = "%s,%s,%s,%s,%d,%s\n"
+
+def _write_all(fd, data):
+    """Writes all of data to a raw file descriptor."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _open_csv(path, columns):
+    """Opens a CSV file for raw appends, writing the header if the file is new."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    if os.fstat(fd).st_size == 0:
+        _write_all(fd, (",".join(columns) + "\n").encode())
+    return fd
+
+def _ensure_files():
+    """
+    Opens both CSV files for appending once, writing the header to any new file.
+    Whether a header is needed is decided here from the file size, so the
+    per-message append functions never have to check the file system.
+    """
+    global _free_fd, _wifi_fd
+    if _free_fd is None:
+        _free_fd = _open_csv(FREE_SPACE_CSV, FREE_SPACE_COLS)
+        _wifi_fd = _open_csv(WIFI_CSV, WIFI_COLS)
+        atexit.register(_close_files)
+
+def _write_rows():
+    """
+    Formats the unflushed rows and writes them to the CSV files in one call each.
+    The buffers are emptied first, so rows whose write fails are dropped rather
+    than written twice by the next flush.
+    """
+    global _unflushed_free_rows, _unflushed_wifi_rows
+    free_rows, wifi_rows = _unflushed_free_rows, _unflushed_wifi_rows
+    _unflushed_free_rows = []
+    _unflushed_wifi_rows = []
+    if free_rows:
+        _write_all(_free_fd, "".join([_FREE_SPACE_LINE % tuple("" if v is None else v for v in row)
+                                      for row in free_rows]).encode())
+    if wifi_rows:
+        _write_all(_wifi_fd, "".join([_WIFI_LINE % row for row in wifi_rows]).encode())
+    flushed_rows.put((free_rows, wifi_rows))
+
+def _flush_files(messages=1):
+    """
+    Writes the buffered rows to both CSV files once every CSV_FLUSH_EVERY processed
+    messages and passes them on to the GUI through flushed_rows.
+    """
+    global _unflushed_messages
+    _unflushed_messages += messages
+    if _unflushed_messages >= CSV_FLUSH_EVERY:
+        _write_rows()
+        _unflushed_messages = 0
+
+def _close_files():
+    """Writes any buffered rows and closes both CSV files."""
+    with store_lock:
+        _write_rows()
+        os.close(_free_fd)
+        os.close(_wifi_fd)
+
 def append_free_space_csv(free_space_data, timestamp):
     """
     Appends a row of free space detection data to FREE_SPACE_CSV.
     CSV Columns: timestamp, frame_differencing, background_subtraction,
                  contour_detection, ssim, mean
     """
-    file_exists = os.path.exists(FREE_SPACE_CSV)
-    with open(FREE_SPACE_CSV, "a", newline="") as csvfile:
-        fieldnames = ["timestamp", "frame_differencing", "background_subtraction", 
-                      "contour_detection", "ssim", "mean"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        row = {"timestamp": timestamp}
-        row.update(free_space_data)
-        writer.writerow(row)
+    _ensure_files()
+    # Missing values are None, which are written as an empty field
+    row = (timestamp,) + tuple(free_space_data.get(col) for col in FREE_SPACE_COLS[1:])
+    _unflushed_free_rows.append(row)
     if DEBUG:
         print(f"[DEBUG] Appended free space detection data to {FREE_SPACE_CSV}")
 
 def append_wifi_csv(wifi_data):
     """
-    Appends rows of Wi-Fi detection data to WIFI_CSV.
+    Appends rows of Wi-Fi detection data, as returned by parse_wifi_detection(),
+    to WIFI_CSV.
     CSV Columns: timestamp, mac, vendor, trusted_name, signal, status
     """
-    file_exists = os.path.exists(WIFI_CSV)
-    with open(WIFI_CSV, "a", newline="") as csvfile:
-        fieldnames = ["timestamp", "mac", "vendor", "trusted_name", "signal", "status"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        for entry in wifi_data:
-            writer.writerow(entry)
+    _ensure_files()
+    _unflushed_wifi_rows.extend(wifi_data)
     if DEBUG:
         print(f"[DEBUG] Appended Wi-Fi detection data to {WIFI_CSV}")
 
 def process_and_write_data(raw_text):
     """
-    Processes the raw MQTT message text by splitting it into free space and Wi-Fi sections,
+    Parses the raw MQTT message text for free space results and Wi-Fi detections,
     then appends the extracted data to their respective CSV files.
+    The files are not flushed here; see process_messages().
     """
-    lines = raw_text.splitlines()
     if DEBUG:
         print("[DEBUG] Processing raw text message.")
-    free_space_lines = []
-    wifi_lines = []
-    free_space_section = False
-    wifi_section = False
-
-    for line in lines:
-        line = line.strip()
-        # Start free space detection section if header is detected
-        if line.startswith("===") and "Free Space Detection Results" in line:
-            free_space_section = True
-            wifi_section = False
-            continue
-        # Lines starting with '[' and containing "MAC:" indicate Wi-Fi messages
-        if line.startswith("[") and "MAC:" in line:
-            wifi_section = True
-            free_space_section = False
-        if free_space_section:
-            free_space_lines.append(line)
-        if wifi_section:
-            wifi_lines.append(line)
-    
-    free_space_data = parse_free_space_detection(free_space_lines)
-    wifi_data = parse_wifi_detection(wifi_lines)
+    # Each publisher sends one kind of message, so dispatch on a cheap substring
+    # test and only run the pattern that can match
+    free_space_data = parse_free_space_detection(raw_text) if "%" in raw_text else {}
+    wifi_data = parse_wifi_detection(raw_text) if "MAC:" in raw_text else []
     
     # Use timestamp from first Wi-Fi detection if available; otherwise, use current time.
     if wifi_data:
-        timestamp = wifi_data[0]["timestamp"]
+        timestamp = wifi_data[0][0]
     else:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -452,13 +880,40 @@ def on_connect(client, userdata, flags, rc, properties=None):
     print(f"[DEBUG] Subscribed to topic: {MQTT_TOPIC}")
 
 def on_message(client, userdata, msg):
-    # Decode the incoming MQTT message payload.
-    message = msg.payload.decode()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[DEBUG] Message received at {timestamp}:")
-    print(message)
-    # Process the raw message text to extract and save the data.
-    process_and_write_data(message)
+    # Hand the raw payload to process_messages(); keep the network thread free
+    message_queue.put_nowait(msg.payload)
+
+def process_messages():
+    """
+    Drains received MQTT payloads in batches of up to MESSAGE_BATCH_SIZE, writes
+    each one to the CSV files, then flushes and notifies the GUI once per batch.
+    A payload or write that fails is reported and skipped, so one bad message
+    never stops the thread.
+    """
+    while True:
+        batch = [message_queue.get()]
+        try:
+            while len(batch) < MESSAGE_BATCH_SIZE:
+                batch.append(message_queue.get_nowait())
+        except queue.Empty:
+            pass
+        with store_lock:
+            for payload in batch:
+                try:
+                    # Decode the incoming MQTT message payload.
+                    message = payload.decode()
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    print(f"[DEBUG] Message received at {timestamp}:")
+                    print(message)
+                    # Process the raw message text to extract and save the data.
+                    process_and_write_data(message)
+                except Exception as e:
+                    print(f"[ERROR] Skipping message {payload[:80]!r}: {e}")
+            try:
+                _flush_files(len(batch))
+            except OSError as e:
+                print(f"[ERROR] Failed to write CSV rows: {e}")
+        data_changed.set()
 
 def start_subscriber():
     """
@@ -479,11 +934,12 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
-    import threading
-
     # Start the MQTT subscriber in a background daemon thread
     subscriber_thread = threading.Thread(target=start_subscriber, daemon=True)
     subscriber_thread.start()
+    # Write received messages to the CSV files in batches
+    writer_thread = threading.Thread(target=process_messages, daemon=True)
+    writer_thread.start()
 
     # Start the GUI main loop (this runs in the main thread)
     main()
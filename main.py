@@ -20,18 +20,17 @@ import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import cv2
+import numpy as np
 import threading
 import time
 
 import settings  # so we can update its variables dynamically
-from settings import DEBUG, VISUALIZATION_CONFIG
-from model import calculate_difference
+from settings import (DEBUG, VISUALIZATION_CONFIG, WEBCAM_CONFIG, DETECT_SCALE,
+                      MORPH_KERNEL_SIZE, MORPH_KERNEL_SHAPE, USE_RLE_MORPH)
+from model import calculate_difference, update_distance_lut
 import controller  # Uses run_tcpdump, webcam_feed, and global variables
 from mqtt_setup import publish_log
 
-# Global variable for PhotoImage to prevent garbage collection
-photo = None
-
 # Timeout (in seconds) to consider a device “lost”
 DEVICE_TIMEOUT = 5.0
 
@@ -40,126 +39,261 @@ print_interval_ms = 3000
 
 CAMERA_LOG_INTERVAL = 1000 #ms
 
+# Detection report published every CAMERA_LOG_INTERVAL, filled in by print_detection_results()
+LOG_TEMPLATE = (
+    "=== Free Space Detection Results ===\n"
+    "Frame Differencing: {Frame Differencing}\n"
+    "Background Subtraction: {Background Subtraction}\n"
+    "Contour Detection: {Contour Detection}\n"
+    "SSIM: {SSIM}\n"
+    "Mean of Enabled Methods: {mean}"
+)
+
 # ================= DETECTION METHOD FUNCTIONS =================
-def detect_frame_differencing(baseline, current):
-    diff = cv2.absdiff(baseline, current)
-    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
-    changed_pixels = cv2.countNonZero(thresh)
-    total_pixels = thresh.shape[0] * thresh.shape[1]
-    diff_percent = (changed_pixels / total_pixels) * 100
-    return diff_percent, thresh
-
-def detect_background_subtraction(baseline, current):
-    diff = cv2.absdiff(baseline, current)
-    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY)
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-    cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-    changed_pixels = cv2.countNonZero(cleaned)
-    total_pixels = cleaned.shape[0] * cleaned.shape[1]
-    diff_percent = (changed_pixels / total_pixels) * 100
-    return diff_percent, cleaned
-
-def detect_contour_detection(baseline, current):
-    diff = cv2.absdiff(baseline, current)
-    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
-    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    contour_img = current.copy()
-    cv2.drawContours(contour_img, contours, -1, (0, 255, 0), 2)
-    total_area = current.shape[0] * current.shape[1]
-    contour_area = sum(cv2.contourArea(c) for c in contours)
-    diff_percent = (contour_area / total_area) * 100
-    return diff_percent, contour_img, contours
-
-def detect_ssim(baseline, current):
-    diff_percent, binary_diff, ssim_diff = calculate_difference(baseline, current)
-    return diff_percent, binary_diff, ssim_diff
+# Detection methods, in the order they are reported, with their live feed labels
+DETECTION_METHODS = {
+    "Frame Differencing": "Frame Diff",
+    "Background Subtraction": "Background Sub",
+    "Contour Detection": "Contour",
+    "SSIM": "SSIM",
+}
+
+# Frames from controller.webcam_feed() always have this size
+FRAME_HEIGHT = WEBCAM_CONFIG['frame_height']
+FRAME_WIDTH = WEBCAM_CONFIG['frame_width']
+
+# The detectors run on grayscale frames halved DETECT_LEVELS times with pyrDown,
+# so contours are scaled back up by exactly DETECT_SCALE only for powers of two
+if DETECT_SCALE < 1 or DETECT_SCALE & (DETECT_SCALE - 1):
+    raise ValueError(f"DETECT_SCALE must be a power of two, got {DETECT_SCALE}")
+DETECT_LEVELS = DETECT_SCALE.bit_length() - 1
+PYRAMID_SIZES = [(FRAME_HEIGHT, FRAME_WIDTH)]
+for _ in range(DETECT_LEVELS):
+    PYRAMID_SIZES.append(((PYRAMID_SIZES[-1][0] + 1) // 2, (PYRAMID_SIZES[-1][1] + 1) // 2))
+DETECT_HEIGHT, DETECT_WIDTH = PYRAMID_SIZES[-1]
+# Multiplier turning a count of detection pixels into a percentage of the frame
+PCT_SCALE = 100.0 / (DETECT_WIDTH * DETECT_HEIGHT)
+
+# Text style of the results overlaid on the live feed
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_SCALE = 0.8
+OVERLAY_COLOR = (0, 255, 255)
+OVERLAY_AVERAGE_COLOR = (255, 0, 0)
+
+# Structuring element of the background subtraction open. MORPH_KERNEL_SIZE is in
+# full-resolution pixels, so it is divided by DETECT_SCALE (rounding up) to remove
+# the same size of specks on the downscaled mask.
+MORPH_SHAPE = {'ellipse': cv2.MORPH_ELLIPSE, 'rect': cv2.MORPH_RECT}[MORPH_KERNEL_SHAPE]
+DETECT_KERNEL_SIZE = -(-MORPH_KERNEL_SIZE // DETECT_SCALE)
+MORPH_KERNEL = cv2.getStructuringElement(MORPH_SHAPE, (DETECT_KERNEL_SIZE, DETECT_KERNEL_SIZE))
+
+# Run-length morphology (opencv-contrib), used for the open if enabled and available
+cv2_rl = getattr(getattr(cv2, "ximgproc", None), "rl", None) if USE_RLE_MORPH else None
+if cv2_rl is not None:
+    RL_MORPH_KERNEL = cv2_rl.getStructuringElement(MORPH_SHAPE, (DETECT_KERNEL_SIZE, DETECT_KERNEL_SIZE))
+elif USE_RLE_MORPH:
+    print("[WARNING] cv2.ximgproc.rl is not available; using cv2.morphologyEx instead.")
+
+# Side of the thumbnail used to tell whether a frame differs from the last one detected
+SIGNATURE_SIZE = 8
+
+# Intermediate images of run_detectors(), allocated once and reused every frame
+detect_bufs = {
+    "pyramid": [np.empty(size, np.uint8) for size in PYRAMID_SIZES],
+    "diff": np.empty((DETECT_HEIGHT, DETECT_WIDTH), np.uint8),
+    "thresh30": np.empty((DETECT_HEIGHT, DETECT_WIDTH), np.uint8),
+    "thresh50": np.empty((DETECT_HEIGHT, DETECT_WIDTH), np.uint8),
+    "cleaned": np.empty((DETECT_HEIGHT, DETECT_WIDTH), np.uint8),
+    "filled": np.empty((DETECT_HEIGHT, DETECT_WIDTH), np.uint8),
+    "signature": np.empty((SIGNATURE_SIZE, SIGNATURE_SIZE), np.uint8),
+}
+
+def detection_gray(frame, bufs=None):
+    """
+    Converts a BGR frame to the grayscale image the detectors work on, downscaled
+    by DETECT_SCALE. The result is written into bufs if given, otherwise it is a
+    newly allocated image.
+    """
+    pyramid = bufs["pyramid"] if bufs is not None else [None] * len(PYRAMID_SIZES)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pyramid[0])
+    for level in range(1, len(PYRAMID_SIZES)):
+        gray = cv2.pyrDown(gray, dst=pyramid[level])
+    return gray
 
-# ================= GUI UPDATE FUNCTIONS =================
-def update_device_table():
+def run_detectors(baseline_gray, current_gray, enabled, bufs, keep_contours=True):
     """
-    Updates the Treeview table with the current devices from controller.devices_info.
-    Devices not seen within DEVICE_TIMEOUT seconds are removed.
+    Runs the enabled detection methods on baseline and current frames, both as
+    returned by detection_gray().
+    The absolute difference is computed once and its thresholds are shared between
+    methods, with every intermediate image written into bufs.
+    enabled maps each name in DETECTION_METHODS to whether it should run.
+    Returns (results, contours): results maps each enabled method to its percentage,
+    and contours is None unless Contour Detection is enabled and keep_contours is set.
+    Contours are in detection coordinates; multiply them by DETECT_SCALE to draw on
+    the frame.
     """
-    current_time = time.time()
-    # Clear existing rows
-    for row in device_table.get_children():
-        device_table.delete(row)
-    keys_to_remove = []
-    for mac, info in list(controller.devices_info.items()):
-        age = current_time - info["last_seen"]
-        if age > DEVICE_TIMEOUT:
-            keys_to_remove.append(mac)
+    use_fd = enabled["Frame Differencing"]
+    use_bs = enabled["Background Subtraction"]
+    use_contour = enabled["Contour Detection"]
+    results = {}
+    contours = None
+    
+    if use_fd or use_bs or use_contour:
+        diff = cv2.absdiff(baseline_gray, current_gray, dst=bufs["diff"])
+    if use_fd or use_contour:
+        _, thresh30 = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY, dst=bufs["thresh30"])
+    
+    # Frame Differencing: share of pixels that changed by more than 30
+    if use_fd:
+        results["Frame Differencing"] = cv2.countNonZero(thresh30) * PCT_SCALE
+    
+    # Background Subtraction: changes above 50, with small specks opened away
+    if use_bs:
+        if cv2_rl is not None:
+            # Threshold and open as row runs; each run is (x_start, x_end inclusive, y)
+            runs = cv2_rl.threshold(diff, 50, cv2.THRESH_BINARY)
+            runs = cv2_rl.morphologyEx(runs, cv2.MORPH_OPEN, RL_MORPH_KERNEL).reshape(-1, 3)
+            changed_pixels = int((runs[:, 1] - runs[:, 0] + 1).sum())
         else:
-            device_table.insert("", "end", values=(
-                info["mac"],
-                info["vendor"],
-                info["signal"],
-                f"{age:.1f}"
-            ))
-    for mac in keys_to_remove:
-        del controller.devices_info[mac]
-    # Schedule next table update (every 5 seconds)
-    root.after(5000, update_device_table)
+            _, thresh50 = cv2.threshold(diff, 50, 255, cv2.THRESH_BINARY, dst=bufs["thresh50"])
+            cleaned = cv2.morphologyEx(thresh50, cv2.MORPH_OPEN, MORPH_KERNEL, dst=bufs["cleaned"])
+            changed_pixels = cv2.countNonZero(cleaned)
+        results["Background Subtraction"] = changed_pixels * PCT_SCALE
+    
+    # Contour Detection: area enclosed by the outer contours of the changed regions,
+    # holes included, measured by filling them into a mask
+    if use_contour:
+        found, _ = cv2.findContours(thresh30, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        filled = bufs["filled"]
+        filled.fill(0)
+        cv2.drawContours(filled, found, -1, 255, cv2.FILLED)
+        results["Contour Detection"] = cv2.countNonZero(filled) * PCT_SCALE
+        if keep_contours:
+            contours = found
+    
+    if enabled["SSIM"]:
+        results["SSIM"], _, _ = calculate_difference(baseline_gray, current_gray)
+    
+    return results, contours
+
+# Which detection methods are enabled. Replaced as a whole by update_enabled_methods()
+# so the detection worker never has to touch the Tk variables.
+enabled_methods = dict.fromkeys(DETECTION_METHODS, True)
+
+# Latest (results, contours) from detection_worker(), with contours in frame
+# coordinates, or None if there is no baseline yet. Replaced as a whole.
+detection_state = None
+
+# Whether the live feed is on screen, so contours are worth keeping for the overlay.
+# Set by update_gui().
+feed_visible = True
+
+def update_enabled_methods():
+    """Copies the detection method checkboxes into enabled_methods."""
+    global enabled_methods
+    enabled_methods = {
+        "Frame Differencing": var_frame_diff.get(),
+        "Background Subtraction": var_background_sub.get(),
+        "Contour Detection": var_contour.get(),
+        "SSIM": var_ssim.get(),
+    }
+
+def detection_worker():
+    """
+    Runs the enabled detectors on each new webcam frame, off the Tk thread, and
+    publishes the outcome in detection_state for the GUI and the MQTT log.
+    Frames whose downsampled signature matches the last detected frame keep the
+    previous results, as long as the baseline and detector options are unchanged.
+    """
+    global detection_state
+    last_frame = None
+    last_inputs = (None, None, None)
+    last_signature = None
+    while not controller.stop_event.is_set():
+        # Wake up for each new frame, checking for shutdown at least every 100 ms
+        if not controller.frame_ready.wait(0.1):
+            continue
+        controller.frame_ready.clear()
+        frame = controller.frame
+        baseline_gray = controller.baseline_gray
+        if frame is None or baseline_gray is None:
+            detection_state = None
+            last_inputs = (None, None, None)
+            continue
+        enabled, keep_contours = enabled_methods, feed_visible
+        inputs = (baseline_gray, enabled, keep_contours)
+        same_inputs = all(a is b for a, b in zip(inputs, last_inputs))
+        if same_inputs and frame is last_frame:
+            continue
+        current_gray = detection_gray(frame, detect_bufs)
+        cv2.resize(current_gray, (SIGNATURE_SIZE, SIGNATURE_SIZE), dst=detect_bufs["signature"],
+                   interpolation=cv2.INTER_AREA)
+        signature = detect_bufs["signature"].tobytes()
+        last_frame = frame
+        if same_inputs and signature == last_signature:
+            continue
+        last_inputs = inputs
+        last_signature = signature
+        results, contours = run_detectors(baseline_gray, current_gray, enabled, detect_bufs,
+                                          keep_contours=keep_contours)
+        if contours is not None and DETECT_SCALE != 1:
+            # findContours() returns new arrays every frame, so they are scaled in place
+            for contour in contours:
+                contour *= DETECT_SCALE
+        detection_state = (results, contours)
+    if DEBUG:
+        print("[DEBUG] Detection worker thread terminated.")
 
+# ================= GUI UPDATE FUNCTIONS =================
 def update_gui():
     """
     Periodically update the GUI:
       - Refresh the live camera feed.
-      - If a baseline is captured, run the enabled detection methods and overlay the results.
+      - If a baseline is captured, overlay the latest results of the detection worker.
       - Compute and overlay the average difference from enabled methods.
     """
-    global photo
-    if controller.frame is not None:
-        display_frame = controller.frame.copy()
+    global feed_visible
+    feed_visible = root.state() != "iconic"
+    frame = controller.frame
+    if frame is not None:
+        # Overlays are drawn on a reused copy; the shared frame is never modified
+        display_frame = live_feed_bgr
+        np.copyto(display_frame, frame)
         
-        if controller.baseline_image is not None:
-            detection_results = {}
+        state = detection_state
+        if state is not None:
             y_offset = 30
-
-            if var_frame_diff.get():
-                diff_fd, _ = detect_frame_differencing(controller.baseline_image, display_frame)
-                detection_results["Frame Diff"] = diff_fd
-
-            if var_background_sub.get():
-                diff_bs, _ = detect_background_subtraction(controller.baseline_image, display_frame)
-                detection_results["Background Sub"] = diff_bs
-
-            if var_contour.get():
-                diff_contour, contour_img, _ = detect_contour_detection(controller.baseline_image, display_frame)
-                detection_results["Contour"] = diff_contour
-                display_frame = contour_img
-
-            if var_ssim.get():
-                diff_ssim, _, _ = detect_ssim(controller.baseline_image, display_frame)
-                detection_results["SSIM"] = diff_ssim
+            detection_results, contours = state
+            if contours is not None:
+                cv2.drawContours(display_frame, contours, -1, (0, 255, 0), 2)
 
             # Overlay individual detection results
             for i, (method, diff_val) in enumerate(detection_results.items()):
-                cv2.putText(display_frame, f"{method}: {diff_val:.2f}%", (20, y_offset + i * 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA)
+                cv2.putText(display_frame, f"{DETECTION_METHODS[method]}: {diff_val:.2f}%", (20, y_offset + i * 30),
+                            OVERLAY_FONT, OVERLAY_SCALE, OVERLAY_COLOR, 2, cv2.LINE_AA)
             # Compute and overlay the average difference if any method is enabled
             if detection_results:
                 average_diff = sum(detection_results.values()) / len(detection_results)
                 cv2.putText(display_frame, f"Average: {average_diff:.2f}%", (20, y_offset + len(detection_results) * 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2, cv2.LINE_AA)
+                            OVERLAY_FONT, OVERLAY_SCALE, OVERLAY_AVERAGE_COLOR, 2, cv2.LINE_AA)
         
-        # Convert BGR (OpenCV) to RGB (Tkinter)
-        cv_img = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(cv_img)
-        photo = ImageTk.PhotoImage(image=img)
-        live_feed_label.config(image=photo)
+        # Convert BGR (OpenCV) to RGB (Tkinter) and repaint the live feed image in place
+        cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB, dst=live_feed_rgb)
+        live_feed_photo.paste(Image.frombuffer("RGB", (FRAME_WIDTH, FRAME_HEIGHT), live_feed_rgb,
+                                               "raw", "RGB", 0, 1))
     
     root.after(100, update_gui)
 
 def capture_baseline():
     """
-    Capture the current frame as the baseline image.
+    Capture the current frame as the baseline image, along with the grayscale
+    copy the detectors compare against.
     """
-    if controller.frame is not None:
-        controller.baseline_image = controller.frame.copy()
+    # Frames are never modified once published, so the current one can be kept as is
+    baseline = controller.frame
+    if baseline is not None:
+        controller.baseline_gray = detection_gray(baseline)
+        controller.baseline_image = baseline
         if DEBUG:
             print("[DEBUG] Baseline image captured via GUI.")
 
@@ -167,14 +301,14 @@ def close_program():
     """
     Signal background threads to stop and close the GUI.
     """
-    controller.stop_threads = True
+    controller.shutdown()
     root.destroy()
     if DEBUG:
         print("[DEBUG] Program is closing.")
 
 def print_detection_results():
     """
-    Every 3 seconds, this function prints to the terminal the results from the free space detection methods.
+    Publishes the latest results from the free space detection methods via MQTT.
     It prints the individual detection percentages for:
       • Frame Differencing
       • Background Subtraction
@@ -183,61 +317,36 @@ def print_detection_results():
     Only the enabled methods are computed; disabled methods are marked as DISABLED.
     Finally, it prints the mean of the enabled methods (or indicates if all are disabled).
     """
-    if controller.baseline_image is not None and controller.frame is not None:
-        # Copy the current frame for processing
-        current_frame = controller.frame.copy()
-        detection_results = {}
-        output_lines = []
-        output_lines.append("=== Free Space Detection Results ===")
-        
-        # Frame Differencing
-        if var_frame_diff.get():
-            diff_fd, _ = detect_frame_differencing(controller.baseline_image, current_frame)
-            detection_results["Frame Differencing"] = diff_fd
-            output_lines.append(f"Frame Differencing: {diff_fd:.2f}%")
-        else:
-            output_lines.append("Frame Differencing: DISABLED")
-        
-        # Background Subtraction
-        if var_background_sub.get():
-            diff_bs, _ = detect_background_subtraction(controller.baseline_image, current_frame)
-            detection_results["Background Subtraction"] = diff_bs
-            output_lines.append(f"Background Subtraction: {diff_bs:.2f}%")
-        else:
-            output_lines.append("Background Subtraction: DISABLED")
-        
-        # Contour Detection
-        if var_contour.get():
-            diff_contour, _, _ = detect_contour_detection(controller.baseline_image, current_frame)
-            detection_results["Contour Detection"] = diff_contour
-            output_lines.append(f"Contour Detection: {diff_contour:.2f}%")
-        else:
-            output_lines.append("Contour Detection: DISABLED")
-        
-        # SSIM
-        if var_ssim.get():
-            diff_ssim, _, _ = detect_ssim(controller.baseline_image, current_frame)
-            detection_results["SSIM"] = diff_ssim
-            output_lines.append(f"SSIM: {diff_ssim:.2f}%")
-        else:
-            output_lines.append("SSIM: DISABLED")
+    state = detection_state
+    if state is not None:
+        detection_results, _ = state
+        # Disabled methods are reported as DISABLED
+        fields = dict.fromkeys(DETECTION_METHODS, "DISABLED")
+        for method, diff_val in detection_results.items():
+            fields[method] = "%.2f%%" % diff_val
         
         # Compute the mean of enabled methods (if any are enabled)
         if detection_results:
-            mean_value = sum(detection_results.values()) / len(detection_results)
-            output_lines.append(f"Mean of Enabled Methods: {mean_value:.2f}%")
+            fields["mean"] = "%.2f%%" % (sum(detection_results.values()) / len(detection_results))
         else:
-            output_lines.append("Mean of Enabled Methods: N/A (all methods disabled)")
+            fields["mean"] = "N/A (all methods disabled)"
+        log_message = LOG_TEMPLATE.format_map(fields)
     else:
-        output_lines = ["Baseline image or current frame not available for detection."]
+        log_message = "Baseline image or current frame not available for detection."
     
-    # Create a single log message
-    log_message = "\n".join(output_lines)
     # print(log_message)  # Optionally print to terminal as well
     publish_log(log_message)  # Publish the log message via MQTT
 
-    # Schedule the next print after 3000 milliseconds (3 seconds)
-    root.after(CAMERA_LOG_INTERVAL, print_detection_results)
+def detection_log_worker():
+    """
+    Calls print_detection_results() every CAMERA_LOG_INTERVAL ms until shutdown,
+    so formatting and publishing never run on the Tk thread.
+    """
+    print_detection_results()
+    while not controller.stop_event.wait(CAMERA_LOG_INTERVAL / 1000):
+        print_detection_results()
+    if DEBUG:
+        print("[DEBUG] Detection log thread terminated.")
 
 # ================= MAIN WINDOW SETUP =================
 root = tk.Tk()
@@ -248,6 +357,11 @@ live_feed_frame = tk.Frame(root)
 live_feed_frame.pack(side="top", fill="both", expand=True)
 live_feed_label = tk.Label(live_feed_frame)
 live_feed_label.pack()
+# One PhotoImage and BGR/RGB buffers are reused for every frame of the live feed
+live_feed_bgr = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8)
+live_feed_rgb = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8)
+live_feed_photo = ImageTk.PhotoImage(image=Image.new("RGB", (FRAME_WIDTH, FRAME_HEIGHT)))
+live_feed_label.config(image=live_feed_photo)
 
 # --- Table Frame for Available Wi-Fi Devices ---
 # --- Table Frame for Available Wi-Fi Devices ---
@@ -292,6 +406,7 @@ def update_settings():
         settings.SCAN_RADIUS_METERS = new_scan_radius
         settings.DEFAULT_TX_POWER = new_tx_power
         settings.PATH_LOSS_EXPONENT = new_path_loss
+        update_distance_lut(new_tx_power, new_path_loss)
         print("[DEBUG] Updated settings:", new_scan_radius, new_tx_power, new_path_loss)
     except Exception as e:
         print("[ERROR] Invalid settings input:", e)
@@ -299,37 +414,49 @@ def update_settings():
 update_button = tk.Button(settings_frame, text="Update Settings", command=update_settings)
 update_button.grid(row=0, column=6, padx=5, pady=2)
 
-def update_device_table():
+# Treeview row id of each MAC currently shown in the device table
+device_rows = {}
+
+def refresh_device_table():
     """
     Updates the Treeview table with the current devices from controller.devices_info.
-    Devices not seen within DEVICE_TIMEOUT seconds are removed.
+    Existing rows are updated in place and new devices appended; only the rows of
+    devices not seen within DEVICE_TIMEOUT seconds (which are also forgotten) or
+    no longer tracked are deleted.
     """
-    current_time = time.time()
-    # Clear existing rows
-    for row in device_table.get_children():
-        device_table.delete(row)
-    keys_to_remove = []
-    for mac, info in list(controller.devices_info.items()):
-        age = current_time - info["last_seen"]
-        if age > DEVICE_TIMEOUT:
-            keys_to_remove.append(mac)
+    # Snapshot the devices, as the tcpdump thread keeps updating them
+    devices = list(controller.devices_info.values())
+    last_seen = np.fromiter((info["last_seen"] for info in devices), np.float64, len(devices))
+    ages = time.time() - last_seen
+    stale = ages > DEVICE_TIMEOUT
+    
+    shown = set()
+    for info, age, is_stale in zip(devices, ages.tolist(), stale.tolist()):
+        mac = info["mac"]
+        if is_stale:
+            # Only forget the entry from the snapshot, not one the tcpdump thread just replaced
+            if controller.devices_info.get(mac) is info:
+                controller.devices_info.pop(mac, None)
+            continue
+        shown.add(mac)
+        # If device is trusted, display its trusted name; otherwise, show vendor.
+        trusted_name = controller.trusted_devices.get(mac)
+        vendor_name = trusted_name if trusted_name else info["vendor"]
+        trusted_status = "Yes" if trusted_name is not None else "No"
+        values = (mac, vendor_name, info["signal"], f"{age:.1f}", trusted_status)
+        row = device_rows.get(mac)
+        if row is None:
+            device_rows[mac] = device_table.insert("", "end", values=values)
         else:
-            # If device is trusted, display its trusted name; otherwise, show vendor.
-            if mac in controller.trusted_devices and controller.trusted_devices[mac]:
-                vendor_name = controller.trusted_devices[mac]
-            else:
-                vendor_name = info["vendor"]
-            trusted_status = "Yes" if mac in controller.trusted_devices else "No"
-            device_table.insert("", "end", values=(
-                info["mac"],
-                vendor_name,
-                info["signal"],
-                f"{age:.1f}",
-                trusted_status
-            ))
-    for mac in keys_to_remove:
-        del controller.devices_info[mac]
-    # Schedule next table update (every 5 seconds)
+            device_table.item(row, values=values)
+    
+    # Delete the rows of devices that timed out or are no longer tracked
+    for mac in device_rows.keys() - shown:
+        device_table.delete(device_rows.pop(mac))
+
+def update_device_table():
+    """Refreshes the device table every 5 seconds. Started once at startup."""
+    refresh_device_table()
     root.after(5000, update_device_table)
 
 def on_device_double_click(event):
@@ -350,7 +477,7 @@ def on_device_double_click(event):
                 name = name_entry.get().strip()
                 if name:  # Only add if a name was provided
                     controller.add_trusted_device(mac, name)
-                    update_device_table()  # Refresh the table to update the trusted status
+                    refresh_device_table()  # Refresh the table to update the trusted status
                 popup.destroy()
             add_button = tk.Button(popup, text="Add as Trusted", command=add_and_close)
             add_button.pack(pady=5)
@@ -378,10 +505,14 @@ var_background_sub = tk.BooleanVar(value=True)
 var_contour        = tk.BooleanVar(value=True)
 var_ssim           = tk.BooleanVar(value=True)
 
-cb_frame_diff     = tk.Checkbutton(detection_frame, text="Frame Differencing", variable=var_frame_diff)
-cb_background_sub = tk.Checkbutton(detection_frame, text="Background Subtraction", variable=var_background_sub)
-cb_contour        = tk.Checkbutton(detection_frame, text="Contour Detection", variable=var_contour)
-cb_ssim           = tk.Checkbutton(detection_frame, text="SSIM", variable=var_ssim)
+cb_frame_diff     = tk.Checkbutton(detection_frame, text="Frame Differencing", variable=var_frame_diff,
+                                   command=update_enabled_methods)
+cb_background_sub = tk.Checkbutton(detection_frame, text="Background Subtraction", variable=var_background_sub,
+                                   command=update_enabled_methods)
+cb_contour        = tk.Checkbutton(detection_frame, text="Contour Detection", variable=var_contour,
+                                   command=update_enabled_methods)
+cb_ssim           = tk.Checkbutton(detection_frame, text="SSIM", variable=var_ssim,
+                                   command=update_enabled_methods)
 cb_frame_diff.pack(side="left", padx=5)
 cb_background_sub.pack(side="left", padx=5)
 cb_contour.pack(side="left", padx=5)
@@ -405,13 +536,18 @@ close_button.pack(side="right", padx=10)
 def start_background_threads():
     tcpdump_thread = threading.Thread(target=controller.run_tcpdump, daemon=True)
     webcam_thread = threading.Thread(target=controller.webcam_feed, daemon=True)
+    log_thread = threading.Thread(target=controller.log_worker, daemon=True)
+    detection_thread = threading.Thread(target=detection_worker, daemon=True)
+    detection_log_thread = threading.Thread(target=detection_log_worker, daemon=True)
     tcpdump_thread.start()
     webcam_thread.start()
+    log_thread.start()
+    detection_thread.start()
+    detection_log_thread.start()
     if DEBUG:
         print("[DEBUG] Background threads started.")
 
 start_background_threads()
 update_gui()
 update_device_table()  # Start updating the device table periodically
-print_detection_results()  # Start printing detection results every 3 seconds
 root.mainloop()
@@ -6,48 +6,212 @@ Contains functions for image processing and empty space detection.
 
 import cv2
 import numpy as np
-from skimage.metrics import structural_similarity as ssim
 from settings import DEFAULT_TX_POWER, PATH_LOSS_EXPONENT, DEBUG
 
-def rssi_to_distance(rssi, tx_power=DEFAULT_TX_POWER, path_loss_exponent=PATH_LOSS_EXPONENT):
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; SSIM then uses OpenCV operations only
+    njit = None
+
+# SSIM parameters: Gaussian window and stabilising constants for 8-bit images
+SSIM_WINDOW = (7, 7)
+SSIM_SIGMA = 1.5
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# SSIM works in float32; every other detection stage stays in uint8.
+# float32 work images of _ssim_moments() and ssim_map(), allocated once per image shape
+_ssim_bufs = {}
+# uint8 SSIM image and thresholded mask of calculate_difference(), allocated once per image shape
+_ssim_u8_bufs = {}
+# The last baseline image seen by _baseline_moments() and its (float32, mean, E[x^2])
+_baseline_cache = (None, None)
+
+# Distances for every whole RSSI from RSSI_LUT_MIN to 0 dBm, built by update_distance_lut()
+# for the (tx_power, path_loss_exponent) in _dist_lut_params
+RSSI_LUT_MIN = -100
+_dist_lut = []
+_dist_lut_params = None
+
+def update_distance_lut(tx_power=DEFAULT_TX_POWER, path_loss_exponent=PATH_LOSS_EXPONENT):
+    """
+    Rebuild the RSSI to distance lookup table, and make tx_power and
+    path_loss_exponent the defaults of rssi_to_distance().
+    """
+    global _dist_lut, _dist_lut_params
+    rssi = np.arange(RSSI_LUT_MIN, 1)
+    _dist_lut = np.power(10.0, (tx_power - rssi) / (10 * path_loss_exponent)).tolist()
+    _dist_lut_params = (tx_power, path_loss_exponent)
+
+def rssi_to_distance(rssi, tx_power=None, path_loss_exponent=None):
     """
     Estimate distance (in meters) based on RSSI using the log-distance path loss model.
+    Whole RSSI values with the table's parameters are looked up instead of computed.
     """
-    distance = 10 ** ((tx_power - rssi) / (10 * path_loss_exponent))
+    if tx_power is None:
+        tx_power = _dist_lut_params[0]
+    if path_loss_exponent is None:
+        path_loss_exponent = _dist_lut_params[1]
+    index = int(rssi) - RSSI_LUT_MIN
+    if (0 <= index < len(_dist_lut) and rssi == int(rssi)
+            and (tx_power, path_loss_exponent) == _dist_lut_params):
+        distance = _dist_lut[index]
+    else:
+        distance = 10 ** ((tx_power - rssi) / (10 * path_loss_exponent))
     if DEBUG:
         print(f"[DEBUG] rssi_to_distance() -> rssi: {rssi}, tx_power: {tx_power}, "
               f"exponent: {path_loss_exponent}, estimated distance: {distance:.2f}m")
     return distance
 
-def calculate_difference(baseline, current, threshold_value=50):
+def _gaussian_moments(img, i, sq, mu, mean_sq):
+    """Convert img to float32 into i and blur it and its square into mu and mean_sq."""
+    np.copyto(i, img)
+    cv2.GaussianBlur(i, SSIM_WINDOW, SSIM_SIGMA, dst=mu)
+    cv2.multiply(i, i, dst=sq)
+    cv2.GaussianBlur(sq, SSIM_WINDOW, SSIM_SIGMA, dst=mean_sq)
+
+def _baseline_moments(baseline_gray):
+    """
+    Return the baseline image as float32 with its local mean and E[x^2], computed
+    once per baseline. Baselines are never modified, so the image object
+    identifies them.
+    """
+    global _baseline_cache
+    cached, moments = _baseline_cache
+    if cached is not baseline_gray:
+        i, mu, mean_sq, sq = [np.empty(baseline_gray.shape, np.float32) for _ in range(4)]
+        _gaussian_moments(baseline_gray, i, sq, mu, mean_sq)
+        moments = (i, mu, mean_sq)
+        _baseline_cache = (baseline_gray, moments)
+    return moments
+
+def _ssim_moments(baseline_gray, current_gray):
+    """
+    Compute the Gaussian-weighted local statistics SSIM needs. The baseline's are
+    cached; the rest are written into reused float32 buffers.
+    Returns:
+        moments (tuple): mu1, mu2, E[x^2], E[y^2] and E[xy].
+        scratch (list): four free work buffers.
+        Both are overwritten by the next call.
+    """
+    bufs = _ssim_bufs.get(current_gray.shape)
+    if bufs is None:
+        bufs = _ssim_bufs[current_gray.shape] = [np.empty(current_gray.shape, np.float32) for _ in range(7)]
+    mu2, yy, xy, i2, t1, t2, t3 = bufs
+    i1, mu1, xx = _baseline_moments(baseline_gray)
+    
+    # Local mean and second moments of the current frame, and E[xy]
+    _gaussian_moments(current_gray, i2, t1, mu2, yy)
+    cv2.multiply(i1, i2, dst=t1)
+    cv2.GaussianBlur(t1, SSIM_WINDOW, SSIM_SIGMA, dst=xy)
+    return (mu1, mu2, xx, yy, xy), [i2, t1, t2, t3]
+
+def ssim_map(baseline_gray, current_gray):
     """
-    Calculate the difference between the baseline image and the current frame using SSIM.
+    Compute the SSIM map of two grayscale images (Wang et al.) with OpenCV
+    Gaussian filters, writing every intermediate image into reused buffers.
+    Returns:
+        ssim_full (np.ndarray): float32 SSIM map. It is one of the work buffers,
+        so it is overwritten by the next call.
+    """
+    (mu1, mu2, xx, yy, xy), (s1, t1, t2, t3) = _ssim_moments(baseline_gray, current_gray)
+    
+    # Variances and covariance, with t1 = mu1^2, t2 = mu2^2, t3 = mu1*mu2
+    cv2.multiply(mu1, mu1, dst=t1)
+    cv2.multiply(mu2, mu2, dst=t2)
+    cv2.multiply(mu1, mu2, dst=t3)
+    cv2.subtract(xx, t1, dst=s1)
+    cv2.subtract(yy, t2, dst=yy)
+    cv2.subtract(xy, t3, dst=xy)
+    
+    # (2*mu1*mu2 + C1) * (2*sigma12 + C2) / ((mu1^2 + mu2^2 + C1) * (sigma1^2 + sigma2^2 + C2))
+    t3 *= 2
+    t3 += SSIM_C1
+    xy *= 2
+    xy += SSIM_C2
+    cv2.multiply(t3, xy, dst=t3)
+    t1 += t2
+    t1 += SSIM_C1
+    s1 += yy
+    s1 += SSIM_C2
+    cv2.multiply(t1, s1, dst=t1)
+    cv2.divide(t3, t1, dst=t3)
+    return t3
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _ssim_u8_kernel(mu1, mu2, xx, yy, xy, out):
+        """Fused SSIM formula, clamp to [0, 1] and scale to uint8, in one pass."""
+        for i in prange(out.shape[0]):
+            for j in range(out.shape[1]):
+                m11 = mu1[i, j] * mu1[i, j]
+                m22 = mu2[i, j] * mu2[i, j]
+                m12 = mu1[i, j] * mu2[i, j]
+                num = (2 * m12 + SSIM_C1) * (2 * (xy[i, j] - m12) + SSIM_C2)
+                den = (m11 + m22 + SSIM_C1) * ((xx[i, j] - m11) + (yy[i, j] - m22) + SSIM_C2)
+                value = num / den
+                if value < 0:
+                    value = 0
+                elif value > 1:
+                    value = 1
+                out[i, j] = np.uint8(value * 255 + 0.5)
+    
+    # Compile now rather than on the first frame
+    _ssim_u8_kernel(*[np.ones((1, 1), np.float32)] * 5, np.empty((1, 1), np.uint8))
+
+def _ssim_u8(shape):
+    """Return the reused (ssim_diff, binary_diff) uint8 images for this shape."""
+    bufs = _ssim_u8_bufs.get(shape)
+    if bufs is None:
+        bufs = _ssim_u8_bufs[shape] = (np.empty(shape, np.uint8), np.empty(shape, np.uint8))
+    return bufs
+
+def ssim_image(baseline_gray, current_gray):
+    """
+    Compute the SSIM map of two grayscale images, clamped to [0, 1] and scaled to
+    uint8. Uses a fused numba kernel when numba is installed.
+    Returns:
+        ssim_diff (np.ndarray): uint8 SSIM image, overwritten by the next call.
+    """
+    ssim_diff = _ssim_u8(current_gray.shape)[0]
+    if njit is None:
+        ssim_full = ssim_map(baseline_gray, current_gray)
+        np.clip(ssim_full, 0, 1, out=ssim_full)
+        return cv2.convertScaleAbs(ssim_full, dst=ssim_diff, alpha=255)
+    moments, _ = _ssim_moments(baseline_gray, current_gray)
+    _ssim_u8_kernel(*moments, ssim_diff)
+    return ssim_diff
+
+def calculate_difference(baseline_gray, current_gray, threshold_value=50):
+    """
+    Calculate the difference between the grayscale baseline image and the grayscale
+    current frame using SSIM. Both images returned are reused buffers, overwritten
+    by the next call.
     Returns:
         diff_percent (float): Percentage difference.
         binary_diff (np.ndarray): Binary image after thresholding.
         ssim_diff (np.ndarray): Scaled diff image from SSIM computation.
     """
-    # Convert images to grayscale
-    baseline_gray = cv2.cvtColor(baseline, cv2.COLOR_BGR2GRAY)
-    current_gray = cv2.cvtColor(current, cv2.COLOR_BGR2GRAY)
-    
-    # Compute SSIM and diff image
-    score, diff = ssim(baseline_gray, current_gray, full=True)
-    ssim_diff = (diff * 255).astype("uint8")
+    # Compute the SSIM image, clamped to [0, 1] and scaled to 8 bits
+    ssim_diff = ssim_image(baseline_gray, current_gray)
     
     # Apply thresholding
-    _, binary_diff = cv2.threshold(ssim_diff, threshold_value, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    _, binary_diff = cv2.threshold(ssim_diff, threshold_value, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU,
+                                   dst=_ssim_u8(ssim_diff.shape)[1])
     
     changed_pixels = cv2.countNonZero(binary_diff)
-    total_pixels = binary_diff.shape[0] * binary_diff.shape[1]
-    diff_percent = (changed_pixels / total_pixels) * 100
+    total_pixels = binary_diff.size
+    diff_percent = changed_pixels * (100.0 / total_pixels)
 
     if DEBUG:
+        score = cv2.mean(ssim_diff)[0] / 255
         print(f"[DEBUG] SSIM Score: {score:.4f}")
         print(f"[DEBUG] Changed Pixels: {changed_pixels}, Total Pixels: {total_pixels}")
         print(f"[DEBUG] Difference Percentage: {diff_percent:.2f}%")
     
     return diff_percent, binary_diff, ssim_diff
 
+update_distance_lut()
+
 if __name__ == '__main__':
     pass
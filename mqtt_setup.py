@@ -1,15 +1,56 @@
 # mqtt_utils.py
+import threading
+
 import paho.mqtt.client as mqtt
 
 MQTT_BROKER = 'localhost'
 MQTT_PORT = 1883
 MQTT_TOPIC = 'iot/detection'
 
+# Most messages publish_log() lets wait in the client's outgoing buffer. paho's
+# own queue limits only count QoS > 0 messages, so QoS 0 ones are counted here.
+MAX_PENDING_MESSAGES = 50
+
+# Messages handed to paho but not yet written to the socket
+_pending = 0
+_pending_lock = threading.Lock()
+
+def _on_publish(client, userdata, mid, *args):
+    """Called by paho once a message has been written to the socket."""
+    global _pending
+    with _pending_lock:
+        _pending = max(_pending - 1, 0)
+
+def _on_connect(client, userdata, flags, *args):
+    """paho discards unsent QoS 0 messages when it reconnects, so none are pending."""
+    global _pending
+    with _pending_lock:
+        _pending = 0
+
 # Set up MQTT client
 mqtt_client = mqtt.Client(client_id="Publisher")
+mqtt_client.on_publish = _on_publish
+mqtt_client.on_connect = _on_connect
+# Retry the connection quickly once the broker comes back
+mqtt_client.reconnect_delay_set(min_delay=1, max_delay=8)
 mqtt_client.connect(MQTT_BROKER, MQTT_PORT, keepalive=60)
 mqtt_client.loop_start()
 
 def publish_log(message):
-    """Publish a log message to the MQTT broker."""
-    mqtt_client.publish(MQTT_TOPIC, message)
+    """
+    Publish a log message to the MQTT broker without waiting for it to be sent.
+    The message is dropped if MAX_PENDING_MESSAGES are already waiting to be
+    sent, or if the client is disconnected. Returns whether it was queued.
+    """
+    global _pending
+    with _pending_lock:
+        if _pending >= MAX_PENDING_MESSAGES:
+            return False
+        _pending += 1
+    # paho may call _on_publish from inside publish(), so the lock is not held here
+    info = mqtt_client.publish(MQTT_TOPIC, message, qos=0, retain=False)
+    if info.rc != mqtt.MQTT_ERR_SUCCESS:
+        with _pending_lock:
+            _pending = max(_pending - 1, 0)
+        return False
+    return True
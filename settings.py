@@ -25,8 +25,27 @@ WEBCAM_CONFIG = {
     'device_index': 0,     # Default webcam device index
     'frame_width': 854,    # Width to resize the webcam feed
     'frame_height': 480,   # Height to resize the webcam feed
+    'fps': 30,             # Capture frame rate requested from the webcam
+    'retry_delay': 0.05,   # Seconds to wait after a failed frame capture
+    'max_failures': 100,   # Consecutive failed captures before the feed stops
 }
 
+# ---------------- DETECTION CONFIGURATION ----------------
+# Free space detection runs on frames downscaled by this factor with pyrDown.
+# Must be a power of two; 1 runs the detectors at full resolution. The SSIM
+# window is not rescaled, so above 1 each SSIM window covers a proportionally
+# larger area of the scene.
+DETECT_SCALE = 2
+# Size (in full-resolution pixels) and shape ('ellipse' or 'rect') of the kernel
+# that opens the background subtraction mask. A rectangular kernel is separable, so OpenCV opens with it
+# in much cheaper row and column passes.
+MORPH_KERNEL_SIZE = 5
+MORPH_KERNEL_SHAPE = 'ellipse'
+# Open the mask with OpenCV's run-length morphology (cv2.ximgproc.rl, from
+# opencv-contrib-python), which is much faster for large kernels. Falls back
+# to cv2.morphologyEx when it is not available.
+USE_RLE_MORPH = False
+
 # ---------------- VISUALIZATION CONFIGURATION ----------------
 VISUALIZATION_CONFIG = {
     'plot_update_interval': 0.5,  # Time (in seconds) between plot updates